@@ -1,86 +1,186 @@
 import os
-from flask import Flask, send_from_directory, redirect
+import logging
+import click
+from flask import Flask, send_from_directory, redirect, abort
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
 from config import Config
 from models import db, User, Pet, Clinic, Donation
-from routes import auth_bp, pet_bp, clinic_bp, donation_bp
+from routes import auth_bp, pet_bp, clinic_bp, donation_bp, subscription_bp
 from routes.admin_routes import admin_bp
+from utils.migrations import run_migrations
+from utils import (view_counter, response_cache, image_pipeline, compressor, principal_cache, password_hasher,
+                   metrics, slow_query_log, request_profiler, notifier)
+from utils.json_provider import init_json
+from utils.image_pipeline import original_filename
+from utils.image_upload import collect_garbage
+from utils.upload_stream import UploadRequest
+from utils.assets import AssetManifest, serve_asset
+from utils.database import database_url, engine_options, replica_binds, configure_sqlite
+from utils.replicas import replica_router
+from utils.log import configure_logging
 
 # Get frontend path
+logger = logging.getLogger(__name__)
+
 FRONTEND_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'frontend')
 ADMIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'admin')
 
 def create_app():
-    app = Flask(__name__, static_folder=FRONTEND_PATH, static_url_path='')
+    # Frontend and admin files are served from the in-memory asset manifest
+    app = Flask(__name__, static_folder=None)
+    app.request_class = UploadRequest
     app.config.from_object(Config)
+    configure_logging(app)
+    init_json(app)
+    
+    # Engine options from config; explicit SQLALCHEMY_ENGINE_OPTIONS entries win
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(app.config), **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+    app.config['SQLALCHEMY_BINDS'] = {**replica_binds(app.config), **(app.config.get('SQLALCHEMY_BINDS') or {})}
     
     # Initialize extensions
     db.init_app(app)
+    slow_query_log.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            configure_sqlite(app, engine)
+            if app.config['METRICS_ENABLED']:
+                metrics.instrument_engine(engine)
+            slow_query_log.instrument_engine(engine)
     CORS(app, resources={r"/api/*": {"origins": "*"}})
     jwt = JWTManager(app)
+    view_counter.init_app(app)
+    response_cache.init_app(app)
+    image_pipeline.init_app(app)
+    compressor.init_app(app)
+    principal_cache.init_app(app)
+    password_hasher.init_app(app)
+    replica_router.init_app(app)
+    metrics.init_app(app)
+    request_profiler.init_app(app)
+    notifier.init_app(app)
+    metrics.collect('response_cache_hits_total', lambda: response_cache.hits, 'counter',
+                    'Response cache lookups served from the cache')
+    metrics.collect('response_cache_misses_total', lambda: response_cache.misses, 'counter',
+                    'Response cache lookups that ran the view')
     
     # Ensure upload folder exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
+    assets = AssetManifest({'/': FRONTEND_PATH, '/admin/': ADMIN_PATH}, app.config['ASSET_MANIFEST']).load()
+    app.extensions['assets'] = assets
+    
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(pet_bp, url_prefix='/api/pets')
     app.register_blueprint(clinic_bp, url_prefix='/api/clinics')
     app.register_blueprint(donation_bp, url_prefix='/api/donations')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(subscription_bp, url_prefix='/api/subscriptions')
     
     # Serve uploaded files - MUST be before serve_frontend
-    @app.route('/static/uploads/<filename>')
+    @app.route('/static/uploads/<path:filename>')
     def uploaded_file(filename):
-        upload_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
-        return send_from_directory(upload_folder, filename)
+        upload_folder = app.config['UPLOAD_FOLDER']
+        max_age = app.config['UPLOAD_MAX_AGE']
+        # Variants still being generated fall back to the original, which
+        # must not be cached under the variant's name
+        original = original_filename(filename)
+        if original and not os.path.exists(os.path.join(upload_folder, filename)):
+            filename = original
+            max_age = 0
+        
+        accel = app.config['UPLOAD_ACCEL_REDIRECT']
+        if accel:
+            # nginx serves the file from an internal location
+            if '..' in filename.split('/'):
+                abort(404)
+            response = app.response_class()
+            response.headers['X-Accel-Redirect'] = accel.rstrip('/') + '/' + filename
+            response.headers.pop('Content-Type')
+        else:
+            response = send_from_directory(upload_folder, filename, max_age=max_age)
+        
+        if max_age:
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        return response
+    
+    @app.cli.command('build-assets')
+    def build_assets():
+        """Write precompressed asset variants and the asset manifest"""
+        entries = assets.build()
+        click.echo(f"{len(entries)} assets written to {app.config['ASSET_MANIFEST']}")
+    
+    @app.cli.command('gc-uploads')
+    def gc_uploads():
+        """Delete uploads no pet or clinic references and fix refcounts"""
+        click.echo(collect_garbage())
     
     # Health check
     @app.route('/api/health')
     def health():
         return {'status': 'ok', 'message': 'Pet Tashkent API is running'}
     
+    @app.route('/api/metrics')
+    def metrics_endpoint():
+        if not app.config['METRICS_ENABLED']:
+            abort(404)
+        if not metrics.scrape_allowed():
+            return {'error': 'Forbidden'}, 403
+        return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+    
+    # Upload limits are raised from deep inside the streaming parser; answer them as JSON
+    @app.errorhandler(RequestEntityTooLarge)
+    @app.errorhandler(UnsupportedMediaType)
+    def upload_rejected(e):
+        return {'error': str(e.description)}, e.code
+    
+    def send_asset(url, fallback=None):
+        if app.debug:
+            assets.load()  # Pick up edits without a restart
+        response = serve_asset(assets, url)
+        if response is None and fallback:
+            response = serve_asset(assets, fallback)
+        return response
+    
     # Serve frontend
     @app.route('/')
     def serve_index():
-        return send_from_directory(FRONTEND_PATH, 'index.html')
+        return send_asset('/index.html')
     
     # Serve admin panel - dedicated routes
     @app.route('/admin/')
     @app.route('/admin')
     def serve_admin():
-        return send_from_directory(ADMIN_PATH, 'index.html')
+        return send_asset('/admin/index.html')
     
     @app.route('/admin/<path:filename>')
     def serve_admin_file(filename):
-        file_path = os.path.join(ADMIN_PATH, filename)
-        if os.path.exists(file_path):
-            return send_from_directory(ADMIN_PATH, filename)
-        return send_from_directory(ADMIN_PATH, 'index.html')
+        return send_asset('/admin/' + filename, fallback='/admin/index.html')
     
     @app.route('/<path:filename>')
     def serve_frontend(filename):
-        # Handle static/uploads specially
-        if filename.startswith('static/uploads/'):
-            upload_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
-            upload_filename = filename.replace('static/uploads/', '')
-            return send_from_directory(upload_folder, upload_filename)
-        
-        # Check if file exists in frontend
-        file_path = os.path.join(FRONTEND_PATH, filename)
-        if os.path.exists(file_path):
-            return send_from_directory(FRONTEND_PATH, filename)
+        if filename.startswith('api/'):
+            return {'error': 'Not found'}, 404
         
         # For SPA routing, return index.html
-        if '.' not in filename:
-            return send_from_directory(FRONTEND_PATH, 'index.html')
-        
-        return {'error': 'Not found'}, 404
+        response = send_asset('/' + filename, fallback='/index.html' if '.' not in filename else None)
+        if response is None:
+            return {'error': 'Not found'}, 404
+        return response
     
-    # Create tables and seed admin user
+    # Create tables, apply schema migrations and seed admin user
     with app.app_context():
         db.create_all()
+        run_migrations()
         
         # Create admin user if not exists
         admin = User.query.filter_by(email='admin@pettashkent.uz').first()
@@ -129,7 +229,7 @@ def create_app():
                 db.session.add(clinic)
             
             db.session.commit()
-            print("Admin user and sample data created!")
+            logger.info('Admin user and sample data created')
     
     return app
 
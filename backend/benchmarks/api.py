@@ -0,0 +1,276 @@
+"""Latency, throughput and queries per request for the hot API endpoints.
+
+Drives the app in-process through the Flask test client, or a running
+server such as gunicorn with --url, against a database filled by seed.py.
+Requests are generated from a fixed seed and results are written as JSON,
+so runs can be compared between commits:
+
+    cd backend
+    export DATABASE_URL=sqlite:////tmp/bench.db
+    python benchmarks/seed.py --scale 0.1
+    python benchmarks/api.py --scale 0.1 --out base.json
+    # ...change something...
+    python benchmarks/api.py --scale 0.1 --compare base.json
+
+    gunicorn -w 4 --threads 8 -b 127.0.0.1:8000 app:app &
+    python benchmarks/api.py --scale 0.1 --url http://127.0.0.1:8000
+
+Queries per request are read from /api/metrics, so METRICS_ENABLED must be
+on; with several gunicorn workers they are the ratio seen by whichever
+worker answers the scrape.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed import volumes, PET_TYPES, STATUSES, LOCATIONS, WORDS, CENTER, PASSWORD
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+ADMIN = {'email': 'admin@pettashkent.uz', 'password': 'admin123'}
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else None
+
+# Each scenario: (endpoint name in /api/metrics, function building one request)
+# A request is (method, path, json body or None, needs admin token)
+
+def pets_list(rng, counts):
+    params = {'page': rng.randint(1, 20), 'per_page': 12}
+    if rng.random() < 0.6:
+        params['type'] = rng.choice(PET_TYPES)
+    if rng.random() < 0.4:
+        params['status'] = rng.choice(STATUSES)
+    if rng.random() < 0.2:
+        params['min_price'], params['max_price'] = 100_000, rng.randint(500, 5000) * 1000
+    return 'GET', '/api/pets/list?' + urlencode(params), None, False
+
+def pets_search(rng, counts):
+    params = {'q': rng.choice(WORDS), 'per_page': 12}
+    if rng.random() < 0.5:
+        params['location'] = rng.choice(LOCATIONS)
+    return 'GET', '/api/pets/list?' + urlencode(params), None, False
+
+def pet_detail(rng, counts):
+    return 'GET', f"/api/pets/{rng.randint(1, counts['pets'])}", None, False
+
+def clinics_near(rng, counts):
+    body = {'lat': CENTER[0] + rng.uniform(-0.1, 0.1), 'lng': CENTER[1] + rng.uniform(-0.1, 0.1), 'radius': 3}
+    return 'POST', '/api/clinics/near', body, False
+
+def admin_dashboard(rng, counts):
+    return 'GET', '/api/admin/dashboard', None, True
+
+def donation_stats(rng, counts):
+    return 'GET', '/api/donations/stats', None, True
+
+def login(rng, counts):
+    body = {'email': f"user{rng.randrange(counts['users'])}@example.com", 'password': PASSWORD}
+    return 'POST', '/api/auth/login', body, False
+
+SCENARIOS = {
+    'pets_list': ('pets.list_pets', pets_list),
+    'pets_search': ('pets.list_pets', pets_search),
+    'pet_detail': ('pets.get_pet', pet_detail),
+    'clinics_near': ('clinics.nearby_clinics', clinics_near),
+    'admin_dashboard': ('admin.dashboard', admin_dashboard),
+    'donation_stats': ('donations.admin_stats', donation_stats),
+    'login': ('auth.login', login),
+}
+
+class AppClient:
+    """Requests through the Flask test client, one per thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_data()
+
+class HttpClient:
+    """Requests to a running server"""
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def request(self, method, path, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method, headers=dict(headers or {}))
+        if data is not None:
+            request.add_header('Content-Type', 'application/json')
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+def endpoint_totals(client):
+    """{endpoint: [requests, sql statements]} from the Prometheus text at /api/metrics"""
+    status, body = client.request('GET', '/api/metrics')
+    if status != 200:
+        return None
+    totals = {}
+    for line in body.decode().splitlines():
+        if line.startswith('#') or 'endpoint="' not in line:
+            continue
+        name = line.split('{', 1)[0]
+        if name not in ('http_requests_total', 'sql_statements_total'):
+            continue
+        endpoint = line.split('endpoint="', 1)[1].split('"', 1)[0]
+        entry = totals.setdefault(endpoint, [0, 0])
+        entry[name == 'sql_statements_total'] += float(line.rsplit(' ', 1)[1])
+    return totals
+
+def run_scenario(client, name, counts, args, token):
+    endpoint, build = SCENARIOS[name]
+    rng = random.Random(f'{args.seed}-{name}')
+    requests = [build(rng, counts) for _ in range(args.warmup + args.requests)]
+    auth = {'Authorization': f'Bearer {token}'} if token else {}
+
+    def send(item):
+        method, path, body, admin = item
+        start = time.perf_counter()
+        status, _ = client.request(method, path, body, auth if admin else None)
+        return status, time.perf_counter() - start
+
+    for item in requests[:args.warmup]:
+        send(item)
+
+    before = endpoint_totals(client)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(send, requests[args.warmup:]))
+    elapsed = time.perf_counter() - start
+    after = endpoint_totals(client)
+
+    queries = None
+    if before is not None and after is not None and endpoint in after:
+        seen, statements = after[endpoint]
+        old_seen, old_statements = before.get(endpoint, (0, 0))
+        if seen > old_seen:
+            queries = round((statements - old_statements) / (seen - old_seen), 2)
+
+    latencies = [latency for _, latency in results]
+    statuses = Counter(status for status, _ in results)
+    return {
+        'requests': len(results),
+        'errors': sum(count for status, count in statuses.items() if status >= 500),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'requests_per_sec': round(len(results) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'queries_per_request': queries,
+    }
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True)
+        return commit.stdout.strip() + ('-dirty' if dirty.stdout.strip() else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def in_process_client(args):
+    import config
+    if args.no_cache:
+        config.Config.CACHE_BACKEND = 'none'
+    config.Config.METRICS_ENABLED = True
+    from app import create_app
+    return AppClient(create_app())
+
+def print_table(results, baseline=None):
+    columns = ('requests_per_sec', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request')
+    print(f"{'scenario':<16}" + ''.join(f'{c:>22}' for c in columns))
+    for name, result in results['scenarios'].items():
+        old = (baseline or {}).get('scenarios', {}).get(name, {})
+        cells = []
+        for column in columns:
+            value, previous = result.get(column), old.get(column)
+            cell = '-' if value is None else f'{value:g}'
+            if previous and value is not None:
+                cell += f' ({(value - previous) / previous:+.0%})'
+            cells.append(f'{cell:>22}')
+        print(f'{name:<16}' + ''.join(cells))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='benchmark a running server instead of the in-process app')
+    parser.add_argument('--scale', type=float, default=1.0, help='--scale the database was seeded with')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma-separated subset to run')
+    parser.add_argument('--requests', type=int, default=500, help='timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--threads', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-cache', action='store_true', help='disable the response cache (in-process only)')
+    parser.add_argument('--out', help=f'results file (default: a new file in {RESULTS_DIR})')
+    parser.add_argument('--compare', help='earlier results file to show changes against')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    client = HttpClient(args.url) if args.url else in_process_client(args)
+    counts = volumes(args.scale)
+    status, body = client.request('POST', '/api/auth/login', ADMIN)
+    token = json.loads(body).get('token') if status == 200 else None
+
+    revision = git_revision()
+    results = {
+        'meta': {
+            'revision': revision,
+            'started_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'target': args.url or 'in-process',
+            'database': os.environ.get('DATABASE_URL', '').split('://', 1)[0] or None,
+            'python': platform.python_version(),
+            'scale': args.scale,
+            'requests': args.requests,
+            'threads': args.threads,
+            'seed': args.seed,
+            'response_cache': not args.no_cache,
+        },
+        'scenarios': {},
+    }
+    for name in names:
+        results['scenarios'][name] = run_scenario(client, name, counts, args, token)
+
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime('%Y%m%d-%H%M%S')
+        out = os.path.join(RESULTS_DIR, f"{stamp}-{revision or 'unknown'}.json")
+    with open(out, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+    print(f'Results written to {out}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Login throughput versus password-hash worker count.
+
+Runs concurrent logins against a throwaway SQLite database for each
+PASSWORD_HASH_WORKERS value while a probe thread measures /api/health
+latency, showing how much hashing holds up unrelated requests.
+
+    cd backend && python benchmarks/login_throughput.py --workers 0,1,2,4
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else None
+
+def run(workers, args):
+    import config
+    from app import create_app
+    from models import db, User
+
+    config.Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + tempfile.mktemp(suffix='.db')
+    config.Config.PASSWORD_HASH_WORKERS = workers
+    config.Config.PASSWORD_HASH_METHOD = args.method
+    app = create_app()
+
+    with app.app_context():
+        for i in range(args.users):
+            user = User(full_name=f'Bench {i}', email=f'bench{i}@example.com', role='user')
+            user.set_password('password')
+            db.session.add(user)
+        db.session.commit()
+
+    def login(i):
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.post('/api/auth/login', json={
+            'email': f'bench{i % args.users}@example.com', 'password': 'password'
+        })
+        assert response.status_code == 200, response.get_data(as_text=True)
+        return time.perf_counter() - start
+
+    probe_latencies = []
+    done = threading.Event()
+
+    def probe():
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get('/api/health')
+            probe_latencies.append(time.perf_counter() - start)
+            time.sleep(0.01)
+
+    prober = threading.Thread(target=probe)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        latencies = list(pool.map(login, range(args.logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    prober.join()
+
+    return {
+        'hash_workers': workers,
+        'logins_per_sec': round(args.logins / elapsed, 1),
+        'login_p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'login_p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'health_p95_ms': round(percentile(probe_latencies, 95) * 1000, 1) if probe_latencies else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', default='0,1,2,4', help='comma-separated PASSWORD_HASH_WORKERS values')
+    parser.add_argument('--method', default='scrypt', help='PASSWORD_HASH_METHOD')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8, help='concurrent clients (gunicorn --threads)')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///' + tempfile.mktemp(suffix='.db'))
+    results = [run(int(w), args) for w in args.workers.split(',')]
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
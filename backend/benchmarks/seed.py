@@ -0,0 +1,137 @@
+"""Seed a database with realistic volumes of users, pets, clinics and donations.
+
+Rows are generated from a fixed random seed, so the same --scale gives the
+same data on every run and results stay comparable between commits.
+Everything goes through the app's schema and migrations, so it works for
+SQLite and PostgreSQL alike:
+
+    cd backend && DATABASE_URL=sqlite:///bench.db python benchmarks/seed.py --scale 0.1
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Row counts at --scale 1
+VOLUMES = {'users': 50_000, 'pets': 100_000, 'clinics': 5_000, 'donations': 500_000}
+BATCH_SIZE = 5000
+PASSWORD = 'password'
+
+# Around Tashkent
+CENTER = (41.3111, 69.2797)
+SPREAD = 0.15
+
+PET_TYPES = ['dog', 'cat', 'bird', 'fish', 'rabbit', 'hamster']
+STATUSES = ['selling', 'free', 'foster', 'adoption']
+BREEDS = ['Labrador', 'Husky', 'Persian', 'Siamese', 'Beagle', 'Mixed', 'Shepherd', 'British Shorthair']
+LOCATIONS = ['Chilonzor', 'Yunusobod', 'Mirzo Ulugbek', 'Yakkasaroy', 'Shayxontohur', 'Olmazor', 'Sergeli']
+WORDS = ['friendly', 'playful', 'vaccinated', 'calm', 'healthy', 'trained', 'young', 'loves', 'children', 'garden']
+SERVICES = ['Diagnostika', 'Jarrohlik', 'Vaksinatsiya', 'Parvarish', 'Laboratoriya', 'Shoshilinch yordam']
+PAYMENT_METHODS = ['click', 'payme', 'cash']
+
+def volumes(scale):
+    return {name: max(1, int(count * scale)) for name, count in VOLUMES.items()}
+
+def _created(rng, now, days=365):
+    return now - timedelta(seconds=rng.randrange(days * 24 * 3600))
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _users(rng, count, password_hash, now):
+    for i in range(count):
+        yield {
+            'full_name': f'User {i}', 'email': f'user{i}@example.com', 'password_hash': password_hash,
+            'phone': f'+99890{rng.randrange(10**7):07d}', 'role': 'user',
+            'is_banned': rng.random() < 0.01, 'created_at': _created(rng, now)
+        }
+
+def _pets(rng, count, user_ids, now):
+    for i in range(count):
+        created = _created(rng, now)
+        status = rng.choice(STATUSES)
+        yield {
+            'user_id': rng.choice(user_ids), 'name': f'Pet {i}', 'pet_type': rng.choice(PET_TYPES),
+            'breed': rng.choice(BREEDS), 'age': f'{rng.randrange(1, 12)} oy', 'gender': rng.choice(['male', 'female']),
+            'status': status, 'price': rng.randrange(100, 5000) * 1000 if status == 'selling' else 0,
+            'description': ' '.join(rng.choices(WORDS, k=12)), 'location': rng.choice(LOCATIONS),
+            'approved': rng.random() < 0.9, 'is_active': rng.random() < 0.95, 'views': rng.randrange(500),
+            'created_at': created, 'updated_at': created
+        }
+
+def _clinics(rng, count, now):
+    for i in range(count):
+        yield {
+            'name': f'Clinic {i}', 'address': f'{rng.choice(LOCATIONS)}, {rng.randrange(1, 200)}',
+            'lat': CENTER[0] + rng.uniform(-SPREAD, SPREAD), 'lng': CENTER[1] + rng.uniform(-SPREAD, SPREAD),
+            'phone': f'+99871{rng.randrange(10**7):07d}', 'working_hours': '09:00 - 18:00',
+            'services': ', '.join(rng.sample(SERVICES, 3)), 'rating': round(rng.uniform(3, 5), 1),
+            'is_active': rng.random() < 0.97, 'created_at': _created(rng, now)
+        }
+
+def _donations(rng, count, user_ids, now):
+    for _ in range(count):
+        anonymous = rng.random() < 0.3
+        yield {
+            'user_id': None if anonymous else rng.choice(user_ids), 'amount': rng.randrange(5, 500) * 1000,
+            'currency': 'UZS', 'payment_method': rng.choice(PAYMENT_METHODS),
+            'status': rng.choices(['completed', 'pending', 'failed'], [85, 10, 5])[0],
+            'donor_name': None if anonymous else 'Donor', 'is_anonymous': anonymous, 'created_at': _created(rng, now)
+        }
+
+def seed(app, scale=1.0, rng_seed=42, log=print):
+    """Insert generated rows through the app's engine; returns the row counts"""
+    from sqlalchemy import insert, select
+    from models import db, User, Pet, Clinic, Donation, DailyStat
+
+    rng = random.Random(rng_seed)
+    counts = volumes(scale)
+    now = datetime(2024, 6, 1)
+    with app.app_context():
+        if db.session.query(Pet.id).first() is not None:
+            raise RuntimeError('Database already has pets; seed an empty database')
+        from utils import password_hasher
+        # Every user shares one hash; hashing 50k passwords would take longer than everything else
+        password_hash = password_hasher.hash(PASSWORD)
+
+        def load(model, rows):
+            start = time.perf_counter()
+            for batch in _batches(rows):
+                db.session.execute(insert(model.__table__), batch)
+                db.session.commit()
+            log(f'{model.__tablename__}: {time.perf_counter() - start:.1f}s')
+
+        load(User, _users(rng, counts['users'], password_hash, now))
+        user_ids = db.session.execute(select(User.id).where(User.role == 'user')).scalars().all()
+        load(Pet, _pets(rng, counts['pets'], user_ids, now))
+        load(Clinic, _clinics(rng, counts['clinics'], now))
+        load(Donation, _donations(rng, counts['donations'], user_ids, now))
+
+        # Core inserts skip the mapper events that maintain the rollups
+        DailyStat.rebuild(db.session.connection())
+        db.session.commit()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1.0, help='fraction of the full volumes to generate')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from app import app
+    counts = seed(app, args.scale, args.seed)
+    print(', '.join(f'{count} {name}' for name, count in counts.items()))
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
+from .routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 from .user import User
 from .pet import Pet
 from .clinic import Clinic
 from .donation import Donation
+from .daily_stat import DailyStat
+from .data_version import DataVersion
+from .upload_blob import UploadBlob
+from .subscription import Subscription
 
-__all__ = ['db', 'User', 'Pet', 'Clinic', 'Donation']
+__all__ = ['db', 'User', 'Pet', 'Clinic', 'Donation', 'DailyStat', 'DataVersion', 'UploadBlob', 'Subscription']
@@ -3,6 +3,10 @@ from datetime import datetime
 
 class Clinic(db.Model):
     __tablename__ = 'clinics'
+    __table_args__ = (
+        # Bounding-box fallback where the R*Tree index is unavailable
+        db.Index('ix_clinics_lat_lng', 'lat', 'lng'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -19,6 +23,7 @@ class Clinic(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def to_dict(self):
+        from utils.image_pipeline import image_pipeline
         return {
             'id': self.id,
             'name': self.name,
@@ -31,21 +36,7 @@ class Clinic(db.Model):
             'services': self.services,
             'rating': self.rating,
             'image': self.image,
+            'image_variants': image_pipeline.variants(self.image),
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
-    
-    @staticmethod
-    def get_nearby(lat, lng, radius_km=5):
-        """Get clinics within radius using Haversine formula approximation"""
-        # Approximate degrees per km
-        lat_range = radius_km / 111.0
-        lng_range = radius_km / (111.0 * abs(cos(radians(lat))))
-        
-        return Clinic.query.filter(
-            Clinic.lat.between(lat - lat_range, lat + lat_range),
-            Clinic.lng.between(lng - lng_range, lng + lng_range),
-            Clinic.is_active == True
-        ).all()
-
-from math import cos, radians
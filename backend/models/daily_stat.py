@@ -0,0 +1,209 @@
+from . import db
+from .user import User
+from .pet import Pet
+from .donation import Donation
+from datetime import datetime
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.orm import Session
+
+class DailyStat(db.Model):
+    """Per-day rollup of new users, new pets and donations by status.
+
+    Rows are keyed on (day, metric) where metric is 'users', 'pets',
+    'pets:active', 'pets:pending' or 'donations:<status>'. They count the
+    rows that exist now: mapper events add on insert and subtract on delete
+    (bulk deletes included) and move pets between moderation states on
+    update (bulk updates included), matching what rebuild() computes, so
+    dashboards read a few rows instead of scanning base tables. Summing a
+    metric over every day gives its current total.
+    """
+    __tablename__ = 'daily_stats'
+
+    day = db.Column(db.Date, primary_key=True)
+    metric = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Float, nullable=False, default=0)
+
+    @staticmethod
+    def bump(connection, day, metric, count=1, amount=0):
+        """Atomically add count/amount to a rollup row, creating it if needed"""
+        table = DailyStat.__table__
+        values = {'day': day, 'metric': metric, 'count': count, 'amount': amount or 0}
+        dialect = connection.dialect.name
+
+        if dialect in ('sqlite', 'postgresql'):
+            insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+            stmt = insert(table).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['day', 'metric'],
+                set_={
+                    'count': table.c.count + stmt.excluded.count,
+                    'amount': table.c.amount + stmt.excluded.amount
+                }
+            )
+            connection.execute(stmt)
+            return
+
+        updated = connection.execute(
+            table.update()
+            .where(table.c.day == day, table.c.metric == metric)
+            .values(count=table.c.count + count, amount=table.c.amount + (amount or 0))
+        )
+        if updated.rowcount == 0:
+            connection.execute(table.insert().values(**values))
+
+    @staticmethod
+    def subtract(connection, model, whereclause):
+        """Take the rows a bulk delete of model matching whereclause removes out of the rollups"""
+        day = func.date(model.created_at)
+        if model is Donation:
+            groups = select(day, Donation.status, func.count(), func.sum(Donation.amount))\
+                .where(whereclause).group_by(day, Donation.status)
+            rows = [(d, f'donations:{status}', count, amount) for d, status, count, amount in connection.execute(groups)]
+        elif model is Pet:
+            groups = select(day, Pet.approved, Pet.is_active, func.count())\
+                .where(whereclause).group_by(day, Pet.approved, Pet.is_active)
+            rows = []
+            for d, approved, is_active, count in connection.execute(groups):
+                rows.append((d, 'pets', count, 0))
+                state = pet_state(approved, is_active)
+                if state:
+                    rows.append((d, state, count, 0))
+        else:
+            groups = select(day, func.count()).where(whereclause).group_by(day)
+            rows = [(d, model.__tablename__, count, 0) for d, count in connection.execute(groups)]
+        for d, metric, count, amount in rows:
+            if d is not None:
+                DailyStat.bump(connection, _as_date(d), metric, -count, -(amount or 0))
+
+    @staticmethod
+    def moderate(connection, whereclause, values):
+        """Move the pets a bulk update of approved/is_active to values changes between state rollups"""
+        day = func.date(Pet.created_at)
+        groups = select(day, Pet.approved, Pet.is_active, func.count())\
+            .where(whereclause).group_by(day, Pet.approved, Pet.is_active)
+        for d, approved, is_active, count in connection.execute(groups).all():
+            before = pet_state(approved, is_active)
+            after = pet_state(values.get('approved', approved), values.get('is_active', is_active))
+            if d is None or before == after:
+                continue
+            if before:
+                DailyStat.bump(connection, _as_date(d), before, -count)
+            if after:
+                DailyStat.bump(connection, _as_date(d), after, count)
+
+    @staticmethod
+    def rebuild(connection):
+        """Recompute every rollup row from the base tables; the caller commits"""
+        rows = []
+        for metric, model in (('users', User), ('pets', Pet)):
+            day = func.date(model.created_at)
+            for d, count in connection.execute(select(day, func.count(model.id)).group_by(day)):
+                rows.append({'day': _as_date(d), 'metric': metric, 'count': count, 'amount': 0})
+
+        day = func.date(Pet.created_at)
+        states = select(day, Pet.approved, Pet.is_active, func.count(Pet.id))\
+            .group_by(day, Pet.approved, Pet.is_active)
+        counts = {}
+        for d, approved, is_active, count in connection.execute(states):
+            state = pet_state(approved, is_active)
+            if state:
+                counts[(_as_date(d), state)] = counts.get((_as_date(d), state), 0) + count
+        for (d, state), count in counts.items():
+            rows.append({'day': d, 'metric': state, 'count': count, 'amount': 0})
+
+        day = func.date(Donation.created_at)
+        donations = select(day, Donation.status, func.count(Donation.id), func.sum(Donation.amount))\
+            .group_by(day, Donation.status)
+        for d, status, count, amount in connection.execute(donations):
+            rows.append({'day': _as_date(d), 'metric': f'donations:{status}', 'count': count, 'amount': amount or 0})
+
+        connection.execute(DailyStat.__table__.delete())
+        if rows:
+            connection.execute(DailyStat.__table__.insert(), rows)
+
+def pet_state(approved, is_active):
+    """Moderation state rollup a pet counts towards: 'pets:active', 'pets:pending' or None"""
+    if not is_active:
+        return None
+    return 'pets:active' if approved else 'pets:pending'
+
+def _as_date(value):
+    # SQLite returns func.date() as a string
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    return value
+
+def _day(target):
+    return (target.created_at or datetime.utcnow()).date()
+
+@event.listens_for(User, 'after_insert')
+def _user_created(mapper, connection, target):
+    DailyStat.bump(connection, _day(target), 'users')
+
+@event.listens_for(Pet, 'after_insert')
+def _pet_created(mapper, connection, target):
+    DailyStat.bump(connection, _day(target), 'pets')
+    state = pet_state(target.approved, target.is_active)
+    if state:
+        DailyStat.bump(connection, _day(target), state)
+
+@event.listens_for(Pet, 'after_update')
+def _pet_moderated(mapper, connection, target):
+    state = inspect(target).attrs
+    approved, is_active = state.approved.history, state.is_active.history
+    if not approved.deleted and not is_active.deleted:
+        return
+    before = pet_state(approved.deleted[0] if approved.deleted else target.approved,
+                       is_active.deleted[0] if is_active.deleted else target.is_active)
+    after = pet_state(target.approved, target.is_active)
+    if before != after:
+        if before:
+            DailyStat.bump(connection, _day(target), before, -1)
+        if after:
+            DailyStat.bump(connection, _day(target), after, 1)
+
+@event.listens_for(Donation, 'after_insert')
+def _donation_created(mapper, connection, target):
+    DailyStat.bump(connection, _day(target), f'donations:{target.status}', 1, target.amount)
+
+@event.listens_for(Donation, 'after_update')
+def _donation_status_changed(mapper, connection, target):
+    history = inspect(target).attrs.status.history
+    if not history.deleted:
+        return
+    day = _day(target)
+    DailyStat.bump(connection, day, f'donations:{history.deleted[0]}', -1, -(target.amount or 0))
+    DailyStat.bump(connection, day, f'donations:{target.status}', 1, target.amount)
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    DailyStat.bump(connection, _day(target), 'users', -1)
+
+@event.listens_for(Pet, 'after_delete')
+def _pet_deleted(mapper, connection, target):
+    DailyStat.bump(connection, _day(target), 'pets', -1)
+    state = pet_state(target.approved, target.is_active)
+    if state:
+        DailyStat.bump(connection, _day(target), state, -1)
+
+@event.listens_for(Donation, 'after_delete')
+def _donation_deleted(mapper, connection, target):
+    DailyStat.bump(connection, _day(target), f'donations:{target.status}', -1, -(target.amount or 0))
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bulk_write(orm_execute_state):
+    # Query.delete()/update() skip the mapper events; count what they are about to change
+    if not (orm_execute_state.is_delete or orm_execute_state.is_update):
+        return
+    mapper = orm_execute_state.bind_mapper
+    model = mapper.class_ if mapper is not None else None
+    statement = orm_execute_state.statement
+    if orm_execute_state.is_delete and model in (User, Pet, Donation):
+        DailyStat.subtract(orm_execute_state.session.connection(), model, statement.whereclause)
+    elif orm_execute_state.is_update and model is Pet:
+        values = {key: value for key, value in statement.compile().params.items()
+                  if key in ('approved', 'is_active')}
+        if values:
+            DailyStat.moderate(orm_execute_state.session.connection(), statement.whereclause, values)
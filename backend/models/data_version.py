@@ -0,0 +1,95 @@
+from . import db
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# Tables whose writes invalidate ETags
+TRACKED_TABLES = ('users', 'pets', 'clinics', 'donations')
+
+# Narrower versions for responses that read only a few columns of a table:
+# '<table>.<column>' is bumped when that column changes, or rows come or go
+TRACKED_COLUMNS = {
+    'users': ('full_name',),  # Owner names embedded in pet responses
+}
+
+TRACKED_VERSIONS = TRACKED_TABLES + tuple(
+    f'{table}.{column}' for table, columns in TRACKED_COLUMNS.items() for column in columns
+)
+
+class DataVersion(db.Model):
+    """Monotonic per-table version, bumped right after every committed write.
+
+    Used to derive ETags without reading or serializing the data itself.
+    Bumps run in their own short transaction after the write commits, so
+    concurrent writers don't queue on the shared version rows for the
+    length of their transactions. Until the bump lands a request may pair
+    new data with the old version; the next bump supersedes that ETag.
+    """
+    __tablename__ = 'data_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def get(names):
+        """Current versions of the given tables, in order, from one primary-key lookup"""
+        rows = db.session.query(DataVersion.name, DataVersion.version)\
+            .filter(DataVersion.name.in_(names)).all()
+        versions = dict(rows)
+        return [versions.get(name, 0) for name in names]
+
+    @staticmethod
+    def bump(connection, names):
+        names = sorted(set(names) & set(TRACKED_VERSIONS))
+        if names:
+            table = DataVersion.__table__
+            connection.execute(
+                table.update()
+                .where(table.c.name.in_(names))
+                .values(version=table.c.version + 1)
+            )
+
+def _changed_versions(table, columns=None):
+    """Versions a write to table touches; columns=None for inserts, deletes and unknown sets"""
+    names = {table}
+    for column in TRACKED_COLUMNS.get(table, ()):
+        if columns is None or column in columns:
+            names.add(f'{table}.{column}')
+    return names
+
+def _pending(session):
+    return session.info.setdefault('data_versions', set())
+
+@event.listens_for(Session, 'after_flush')
+def _record_flushed_tables(session, flush_context):
+    names = _pending(session)
+    for obj in list(session.new) + list(session.deleted):
+        if hasattr(obj, '__table__'):
+            names |= _changed_versions(obj.__table__.name)
+    for obj in session.dirty:
+        if hasattr(obj, '__table__'):
+            changed = {attr.key for attr in inspect(obj).attrs if attr.history.has_changes()}
+            names |= _changed_versions(obj.__table__.name, changed)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _record_bulk_statements(orm_execute_state):
+    # Query.update()/delete() and Core statements bypass the flush.
+    # Writes no response depends on opt out with execution_options(skip_data_version=True).
+    if orm_execute_state.execution_options.get('skip_data_version'):
+        return
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            columns = set(orm_execute_state.statement.compile().params) if orm_execute_state.is_update else None
+            _pending(orm_execute_state.session).update(_changed_versions(table.name, columns))
+
+@event.listens_for(Session, 'after_commit')
+def _bump_committed_tables(session):
+    names = session.info.pop('data_versions', None)
+    if names:
+        # The session cannot run SQL here; bump on a connection of its own
+        with db.engine.begin() as connection:
+            DataVersion.bump(connection, names)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_tables(session):
+    session.info.pop('data_versions', None)
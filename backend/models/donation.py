@@ -3,6 +3,12 @@ from datetime import datetime
 
 class Donation(db.Model):
     __tablename__ = 'donations'
+    __table_args__ = (
+        # Completed totals, recent donations and date-range stats
+        db.Index('ix_donations_status_created', 'status', 'created_at'),
+        db.Index('ix_donations_created_at', 'created_at'),
+        db.Index('ix_donations_user_id', 'user_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
@@ -10,7 +16,8 @@ class Donation(db.Model):
     currency = db.Column(db.String(10), default='UZS')
     payment_method = db.Column(db.String(50))  # click, payme, cash
     payment_id = db.Column(db.String(100))  # External payment reference
-    status = db.Column(db.String(50), default='pending')  # pending, completed, failed
+    # pending, completed, failed; the old value is loaded on change for the rollups
+    status = db.column_property(db.Column(db.String(50), default='pending'), active_history=True)
     donor_name = db.Column(db.String(100))
     donor_phone = db.Column(db.String(20))
     message = db.Column(db.Text)
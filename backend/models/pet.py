@@ -3,6 +3,16 @@ from datetime import datetime
 
 class Pet(db.Model):
     __tablename__ = 'pets'
+    __table_args__ = (
+        # Public catalog: approved/is_active equality, newest first
+        db.Index('ix_pets_catalog', 'approved', 'is_active', 'created_at'),
+        db.Index('ix_pets_catalog_type', 'approved', 'is_active', 'pet_type', 'created_at'),
+        db.Index('ix_pets_catalog_status', 'approved', 'is_active', 'status', 'created_at'),
+        # My pets / admin user detail
+        db.Index('ix_pets_user_created', 'user_id', 'created_at'),
+        # Admin listing, recent activity and charts
+        db.Index('ix_pets_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -16,29 +26,29 @@ class Pet(db.Model):
     description = db.Column(db.Text)
     image = db.Column(db.String(255))
     location = db.Column(db.String(200))
-    approved = db.Column(db.Boolean, default=False)
-    is_active = db.Column(db.Boolean, default=True)
+    # Old values are loaded on change so the moderation rollups can move the pet
+    approved = db.column_property(db.Column(db.Boolean, default=False), active_history=True)
+    is_active = db.column_property(db.Column(db.Boolean, default=True), active_history=True)
     views = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'owner_name': self.owner.full_name if self.owner else None,
-            'name': self.name,
-            'pet_type': self.pet_type,
-            'breed': self.breed,
-            'age': self.age,
-            'gender': self.gender,
-            'status': self.status,
-            'price': self.price,
-            'description': self.description,
-            'image': self.image,
-            'location': self.location,
-            'approved': self.approved,
-            'is_active': self.is_active,
-            'views': self.views,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    # Serialized fields in output order; ?fields= may select any subset
+    FIELDS = ('id', 'user_id', 'owner_name', 'name', 'pet_type', 'breed', 'age', 'gender', 'status', 'price',
+              'description', 'image', 'image_variants', 'location', 'approved', 'is_active', 'views', 'created_at')
+    # Computed fields and the columns they read; the rest read their own column
+    FIELD_COLUMNS = {'owner_name': ('user_id',), 'image_variants': ('image',)}
+    FIELD_RELATIONSHIPS = {'owner_name': ('owner', 'full_name')}
+    
+    def serialize_field(self, field):
+        from utils.image_pipeline import image_pipeline
+        if field == 'owner_name':
+            return self.owner.full_name if self.owner else None
+        if field == 'image_variants':
+            return image_pipeline.variants(self.image)
+        if field == 'created_at':
+            return self.created_at.isoformat() if self.created_at else None
+        return getattr(self, field)
+    
+    def to_dict(self, fields=None):
+        return {field: self.serialize_field(field) for field in fields or self.FIELDS}
@@ -0,0 +1,24 @@
+import random
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+# SQLALCHEMY_BINDS keys starting with this are read replicas of the default database
+REPLICA_PREFIX = 'replica'
+
+class RoutingSession(Session):
+    """Session that sends reads of requests marked read-only to a replica.
+
+    Everything else (flushes, INSERT/UPDATE/DELETE, requests without the
+    marker, code outside requests) keeps using the primary. The marker is
+    set by utils.replicas.read_only.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not isinstance(clause, UpdateBase)
+                and has_request_context() and g.get('db_use_replica')):
+            replicas = [engine for key, engine in self._db.engines.items()
+                        if key and key.startswith(REPLICA_PREFIX)]
+            if replicas:
+                return random.choice(replicas)
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
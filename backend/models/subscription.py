@@ -0,0 +1,55 @@
+from . import db
+from datetime import datetime
+from sqlalchemy import literal
+
+# Stored for "any" so criteria match with index seeks (column IN (value, ''))
+# instead of OR ... IS NULL, which can't use the index
+ANY = ''
+
+class Subscription(db.Model):
+    """Saved search; newly approved pets that match are sent to the user on Telegram"""
+    __tablename__ = 'subscriptions'
+    __table_args__ = (
+        # Matching a new pet: IN on type and status, location containment checked
+        # on the index entries, price range on the few hits
+        db.Index('ix_subscriptions_match', 'pet_type', 'status', 'location'),
+        db.Index('ix_subscriptions_user_id', 'user_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    pet_type = db.Column(db.String(50), nullable=False, default=ANY)
+    status = db.Column(db.String(50), nullable=False, default=ANY)
+    location = db.Column(db.String(200), nullable=False, default=ANY)  # Normalized, see normalize()
+    min_price = db.Column(db.Float)
+    max_price = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @staticmethod
+    def normalize(value):
+        """Criteria and pet values are compared trimmed and case-insensitively"""
+        return (value or '').strip().lower()
+    
+    @staticmethod
+    def location_matches(location):
+        """Criterion for subscriptions whose location is part of a pet's normalized location.
+
+        Same substring rule as the catalog's location filter; ANY ('') matches every pet.
+        """
+        return literal(location).ilike('%' + Subscription.location + '%')
+    
+    def matches_price(self, price):
+        price = price or 0
+        return (self.min_price is None or price >= self.min_price) and \
+               (self.max_price is None or price <= self.max_price)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'pet_type': self.pet_type or None,
+            'status': self.status or None,
+            'location': self.location or None,
+            'min_price': self.min_price,
+            'max_price': self.max_price,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,57 @@
+from . import db
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.exc import IntegrityError
+
+class UploadBlob(db.Model):
+    __tablename__ = 'upload_blobs'
+    
+    # Content-addressed path under UPLOAD_FOLDER: ab/cd/<sha256>.<ext>
+    filename = db.Column(db.String(255), primary_key=True)
+    size = db.Column(db.Integer, nullable=False, default=0)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @staticmethod
+    def acquire(connection, filename, size):
+        """Atomically add a reference, creating the row for the first one.
+        
+        Concurrent uploads of the same content all end up counted instead of
+        racing on the first insert. Returns the references now held, as seen
+        by this transaction.
+        """
+        table = UploadBlob.__table__
+        values = {'filename': filename, 'size': size, 'refcount': 1, 'created_at': datetime.utcnow()}
+        increment = table.update().where(table.c.filename == filename).values(refcount=table.c.refcount + 1)
+        dialect = connection.dialect.name
+        
+        if dialect in ('sqlite', 'postgresql'):
+            insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+            stmt = insert(table).values(**values)
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=['filename'],
+                set_={'refcount': table.c.refcount + 1}
+            ))
+        elif not connection.execute(increment).rowcount:
+            try:
+                with connection.begin_nested():
+                    connection.execute(table.insert().values(**values))
+            except IntegrityError:
+                # Another upload of the same file inserted the row first
+                connection.execute(increment)
+        return connection.execute(select(table.c.refcount).where(table.c.filename == filename)).scalar()
+    
+    @staticmethod
+    def release(connection, filename):
+        """Atomically drop a reference; returns the references left, or None if there is no row"""
+        table = UploadBlob.__table__
+        updated = connection.execute(
+            table.update().where(table.c.filename == filename).values(refcount=table.c.refcount - 1)
+        )
+        if not updated.rowcount:
+            return None
+        remaining = connection.execute(select(table.c.refcount).where(table.c.filename == filename)).scalar()
+        if remaining <= 0:
+            connection.execute(table.delete().where(table.c.filename == filename, table.c.refcount <= 0))
+        return remaining
@@ -1,9 +1,12 @@
 from . import db
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Admin user listing and dashboard sign-up stats
+        db.Index('ix_users_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(100), nullable=False)
@@ -16,23 +19,36 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
-    pets = db.relationship('Pet', backref='owner', lazy=True)
+    # Owner is joined-loaded so pet listings serialize without a query per pet
+    pets = db.relationship('Pet', backref=db.backref('owner', lazy='joined'), lazy=True)
     donations = db.relationship('Donation', backref='donor', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        from utils.passwords import password_hasher
+        self.password_hash = password_hasher.hash(password)
+    
+    def set_unusable_password(self):
+        """For accounts that only sign in through Telegram"""
+        from utils.passwords import UNUSABLE_PASSWORD
+        self.password_hash = UNUSABLE_PASSWORD
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'full_name': self.full_name,
-            'email': self.email,
-            'phone': self.phone,
-            'role': self.role,
-            'is_banned': self.is_banned,
-            'telegram_id': self.telegram_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+        from utils.passwords import password_hasher
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        from utils.passwords import password_hasher
+        return password_hasher.needs_rehash(self.password_hash)
+    
+    # Serialized fields in output order; ?fields= may select any subset
+    FIELDS = ('id', 'full_name', 'email', 'phone', 'role', 'is_banned', 'telegram_id', 'created_at')
+    FIELD_COLUMNS = {}
+    
+    def to_dict(self, fields=None):
+        data = {}
+        for field in fields or self.FIELDS:
+            value = getattr(self, field)
+            if field == 'created_at' and value:
+                value = value.isoformat()
+            data[field] = value
+        return data
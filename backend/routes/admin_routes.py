@@ -1,50 +1,73 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Pet, Clinic, Donation
-from utils import admin_required
+from models import db, User, Pet, Clinic, Donation, DailyStat, Subscription
+from utils import admin_required, admin_token_required, response_cache, delete_image, principal_cache
+from utils.search import search_users, rank_users
+from utils.etag import conditional
+from utils.fieldsets import requested_fields, load_fields, InvalidFields
+from utils.bulk import parse_ids, bulk_update, bulk_response, BulkError
+from utils.transfer import TRANSFER_MODELS, FORMATS, TRUE_VALUES, export_rows, read_rows, import_rows
+from utils.replicas import read_only
+from utils.pagination import clamp_per_page, ranked_paginate
 from datetime import datetime, timedelta
 from sqlalchemy import func
 
 admin_bp = Blueprint('admin', __name__)
 
 @admin_bp.route('/dashboard', methods=['GET'])
+@read_only
 @admin_required()
+@conditional('users', 'pets', 'clinics', 'donations', daily=True)
 def dashboard():
     """Get admin dashboard statistics"""
     today = datetime.utcnow().date()
     week_ago = today - timedelta(days=7)
     
+    # Daily rollups for the last week (new users, new pets, donations by status)
+    rollups = DailyStat.query.filter(DailyStat.day >= week_ago).all()
+    
+    def rollup_sum(metric, since, field='count'):
+        return sum(getattr(r, field) for r in rollups if r.metric == metric and r.day >= since)
+    
+    # All-time totals: each rollup summed over every day
+    totals = {
+        metric: (count or 0, amount or 0)
+        for metric, count, amount in db.session.query(
+            DailyStat.metric, func.sum(DailyStat.count), func.sum(DailyStat.amount)
+        ).group_by(DailyStat.metric)
+    }
+    
+    def total(metric, field=0):
+        return totals.get(metric, (0, 0))[field]
+    
     # User stats
-    total_users = User.query.count()
-    new_users_today = User.query.filter(func.date(User.created_at) == today).count()
-    new_users_week = User.query.filter(func.date(User.created_at) >= week_ago).count()
+    total_users = total('users')
+    new_users_today = rollup_sum('users', today)
+    new_users_week = rollup_sum('users', week_ago)
     
     # Pet stats
-    total_pets = Pet.query.count()
-    active_pets = Pet.query.filter_by(is_active=True, approved=True).count()
-    pending_pets = Pet.query.filter_by(approved=False, is_active=True).count()
-    new_pets_today = Pet.query.filter(func.date(Pet.created_at) == today).count()
+    total_pets = total('pets')
+    active_pets = total('pets:active')
+    pending_pets = total('pets:pending')
+    new_pets_today = rollup_sum('pets', today)
     
-    # Clinic stats
+    # Clinic stats (no rollup; a handful of rows)
     total_clinics = Clinic.query.filter_by(is_active=True).count()
     
     # Donation stats
-    total_donations = db.session.query(func.sum(Donation.amount))\
-        .filter_by(status='completed').scalar() or 0
-    today_donations = db.session.query(func.sum(Donation.amount))\
-        .filter(Donation.status == 'completed', func.date(Donation.created_at) == today).scalar() or 0
+    total_donations = total('donations:completed', 1)
+    today_donations = rollup_sum('donations:completed', today, 'amount')
     
     # Recent activity
     recent_pets = Pet.query.order_by(Pet.created_at.desc()).limit(5).all()
     recent_donations = Donation.query.filter_by(status='completed')\
         .order_by(Donation.created_at.desc()).limit(5).all()
     
-    # Charts data - daily pets and donations
-    daily_pets = db.session.query(
-        func.date(Pet.created_at).label('date'),
-        func.count(Pet.id).label('count')
-    ).filter(func.date(Pet.created_at) >= week_ago)\
-    .group_by(func.date(Pet.created_at)).all()
+    # Charts data - daily pets
+    daily_pets = sorted(
+        (r for r in rollups if r.metric == 'pets' and r.count),
+        key=lambda r: r.day
+    )
     
     return jsonify({
         'stats': {
@@ -72,38 +95,43 @@ def dashboard():
             'donations': [d.to_dict() for d in recent_donations]
         },
         'charts': {
-            'daily_pets': [{'date': str(d.date), 'count': d.count} for d in daily_pets]
+            'daily_pets': [{'date': str(r.day), 'count': r.count} for r in daily_pets]
         }
     })
 
 # User management
 @admin_bp.route('/users', methods=['GET'])
+@read_only
 @admin_required()
+@conditional('users')
 def list_users():
     """Get all users"""
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    per_page = clamp_per_page(request.args.get('per_page', type=int))
     search = request.args.get('search', '')
+    try:
+        fields = requested_fields(User)
+    except InvalidFields as e:
+        return jsonify({'error': f'Unknown fields: {e}'}), 400
     
-    query = User.query
+    query = load_fields(User.query, User, fields)
     if search:
-        query = query.filter(
-            (User.full_name.ilike(f'%{search}%')) |
-            (User.email.ilike(f'%{search}%'))
-        )
+        query = search_users(query, search)
     
-    pagination = query.order_by(User.created_at.desc())\
-        .paginate(page=page, per_page=per_page, error_out=False)
+    ranked = rank_users(query, search).order_by(User.created_at.desc())
+    pagination = ranked_paginate(query, ranked, page, per_page)
     
     return jsonify({
-        'users': [u.to_dict() for u in pagination.items],
+        'users': [u.to_dict(fields) for u in pagination.items],
         'total': pagination.total,
         'pages': pagination.pages,
         'current_page': page
     })
 
 @admin_bp.route('/users/<int:user_id>', methods=['GET'])
+@read_only
 @admin_required()
+@conditional('users', 'pets', 'donations')
 def get_user(user_id):
     """Get single user details"""
     user = User.query.get_or_404(user_id)
@@ -129,6 +157,7 @@ def ban_user(user_id):
     
     user.is_banned = True
     db.session.commit()
+    principal_cache.invalidate(user_id)
     
     return jsonify({'message': 'User banned', 'user': user.to_dict()})
 
@@ -139,9 +168,35 @@ def unban_user(user_id):
     user = User.query.get_or_404(user_id)
     user.is_banned = False
     db.session.commit()
+    principal_cache.invalidate(user_id)
     
     return jsonify({'message': 'User unbanned', 'user': user.to_dict()})
 
+@admin_bp.route('/users/bulk/ban', methods=['POST'])
+@admin_token_required()
+def bulk_ban_users():
+    """Ban many users at once: {"ids": [...]}; admins are skipped"""
+    return bulk_set_banned(True)
+
+@admin_bp.route('/users/bulk/unban', methods=['POST'])
+@admin_token_required()
+def bulk_unban_users():
+    """Unban many users at once: {"ids": [...]}"""
+    return bulk_set_banned(False)
+
+def bulk_set_banned(banned):
+    try:
+        ids = parse_ids(request.get_json(silent=True))
+    except BulkError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    skip = (lambda row: 'cannot_ban_admin' if row.role == 'admin' else None) if banned else None
+    results, updated = bulk_update(User, ids, {'is_banned': banned}, skip=skip, columns=('role',))
+    for user_id in updated:
+        principal_cache.invalidate(user_id)
+    
+    return jsonify(bulk_response(results, updated))
+
 @admin_bp.route('/users/<int:user_id>/role', methods=['PUT'])
 @admin_required()
 def change_role(user_id):
@@ -155,6 +210,7 @@ def change_role(user_id):
     
     user.role = new_role
     db.session.commit()
+    principal_cache.invalidate(user_id)
     
     return jsonify({'message': 'Role updated', 'user': user.to_dict()})
 
@@ -167,10 +223,60 @@ def delete_user(user_id):
     if user.role == 'admin':
         return jsonify({'error': 'Cannot delete admin'}), 400
     
-    # Delete user's pets
+    # Release the pets' images, then delete the pets in one statement
+    images = Pet.query.with_entities(Pet.image)\
+        .filter(Pet.user_id == user_id, Pet.image.isnot(None)).all()
+    for (image,) in images:
+        delete_image(image)
     Pet.query.filter_by(user_id=user_id).delete()
+    Subscription.query.filter_by(user_id=user_id).delete()
     
     db.session.delete(user)
     db.session.commit()
+    principal_cache.invalidate(user_id)
+    response_cache.invalidate('pets', 'donations')
     
     return jsonify({'message': 'User deleted'})
+
+# Bulk data transfer
+@admin_bp.route('/export/<table>', methods=['GET'])
+@read_only
+@admin_token_required()
+def export_table(table):
+    """Stream a whole table as CSV or NDJSON (?format=csv|ndjson)"""
+    model = TRANSFER_MODELS.get(table)
+    fmt = request.args.get('format', 'csv')
+    if model is None:
+        return jsonify({'error': 'Unknown table'}), 404
+    if fmt not in FORMATS:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    
+    stamp = datetime.utcnow().strftime('%Y%m%d')
+    return current_app.response_class(
+        stream_with_context(export_rows(model, fmt)),
+        mimetype=FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={table}-{stamp}.{fmt}'}
+    )
+
+@admin_bp.route('/import/<table>', methods=['POST'])
+@admin_token_required()
+def import_table(table):
+    """Load rows from a CSV or NDJSON request body, reporting per-line errors.
+
+    Imported users get the default role unless ?with_roles=1 is passed.
+    """
+    model = TRANSFER_MODELS.get(table)
+    if model is None:
+        return jsonify({'error': 'Unknown table'}), 404
+    fmt = request.args.get('format') or ('ndjson' if request.mimetype == FORMATS['ndjson'] else 'csv')
+    if fmt not in FORMATS:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    
+    # The body is parsed as it arrives, never held in memory as a whole
+    rows = read_rows(request.stream, fmt)
+    privileged = request.args.get('with_roles', '').lower() in TRUE_VALUES
+    report = import_rows(model, rows, current_app.config.get('IMPORT_BATCH_SIZE', 500), privileged=privileged)
+    if report.inserted:
+        response_cache.invalidate('pets', 'clinics', 'donations')
+    
+    return jsonify(report.to_dict())
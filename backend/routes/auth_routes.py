@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from models import db, User
+from utils import response_cache, create_token, current_user_id
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -32,7 +33,7 @@ def register():
     db.session.commit()
     
     # Generate token
-    token = create_access_token(identity=user.id)
+    token = create_token(user)
     
     return jsonify({
         'message': 'Registration successful',
@@ -59,7 +60,12 @@ def login():
     if user.is_banned:
         return jsonify({'error': 'Account is banned'}), 403
     
-    token = create_access_token(identity=user.id)
+    # Upgrade hashes made with older parameters while we have the plaintext
+    if user.password_needs_rehash():
+        user.set_password(password)
+        db.session.commit()
+    
+    token = create_token(user)
     
     return jsonify({
         'message': 'Login successful',
@@ -71,8 +77,8 @@ def login():
 @jwt_required()
 def get_me():
     """Get current user info"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user_id = current_user_id()
+    user = db.session.get(User, user_id)
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -83,8 +89,8 @@ def get_me():
 @jwt_required()
 def update_profile():
     """Update user profile"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user_id = current_user_id()
+    user = db.session.get(User, user_id)
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -97,6 +103,8 @@ def update_profile():
         user.phone = data['phone']
     
     db.session.commit()
+    # Listings embed the owner's name
+    response_cache.invalidate('pets')
     
     return jsonify({
         'message': 'Profile updated',
@@ -128,7 +136,7 @@ def telegram_login():
             phone=username if username else None,
             role='user'
         )
-        user.set_password(str(telegram_id))  # Default password
+        user.set_unusable_password()  # Signs in through Telegram only
         
         db.session.add(user)
         db.session.commit()
@@ -136,7 +144,7 @@ def telegram_login():
     if user.is_banned:
         return jsonify({'error': 'Account is banned'}), 403
     
-    token = create_access_token(identity=user.id)
+    token = create_token(user)
     
     return jsonify({
         'message': 'Telegram login successful',
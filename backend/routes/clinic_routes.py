@@ -1,59 +1,84 @@
+from math import isfinite
 from flask import Blueprint, request, jsonify
 from models import db, Clinic
-from utils import admin_required, save_image, delete_image
-from math import cos, radians
+from utils import admin_required, save_image, delete_image, response_cache
+from utils.geo import find_nearby_clinics
+from utils.etag import conditional
+from utils.replicas import read_only
 
 clinic_bp = Blueprint('clinics', __name__)
 
 @clinic_bp.route('/list', methods=['GET'])
+@read_only
+@conditional('clinics')
+@response_cache.cached('clinics')
 def list_clinics():
     """Get all active clinics"""
     clinics = Clinic.query.filter_by(is_active=True).all()
     return jsonify({'clinics': [clinic.to_dict() for clinic in clinics]})
 
 @clinic_bp.route('/<int:clinic_id>', methods=['GET'])
+@read_only
+@conditional('clinics')
 def get_clinic(clinic_id):
     """Get single clinic details"""
     clinic = Clinic.query.get_or_404(clinic_id)
     return jsonify({'clinic': clinic.to_dict()})
 
 @clinic_bp.route('/near', methods=['POST'])
+@read_only
 def nearby_clinics():
     """Find clinics near location"""
-    data = request.get_json()
+    data = request.get_json() or {}
     
     lat = data.get('lat')
     lng = data.get('lng')
     radius = data.get('radius', 5)  # km
+    limit = data.get('limit')  # k nearest, widening the radius if needed
+    page = data.get('page', 1)
+    per_page = data.get('per_page')
     
     if lat is None or lng is None:
         return jsonify({'error': 'lat and lng required'}), 400
     
-    # Calculate bounding box
-    lat_range = radius / 111.0
-    lng_range = radius / (111.0 * abs(cos(radians(lat))))
-    
-    clinics = Clinic.query.filter(
-        Clinic.lat.between(lat - lat_range, lat + lat_range),
-        Clinic.lng.between(lng - lng_range, lng + lng_range),
-        Clinic.is_active == True
-    ).all()
-    
-    # Calculate actual distance and sort
-    def calc_distance(clinic):
-        from math import sqrt, pow
-        return sqrt(pow((clinic.lat - lat) * 111, 2) + pow((clinic.lng - lng) * 111 * cos(radians(lat)), 2))
+    try:
+        lat, lng, radius = float(lat), float(lng), float(radius)
+        limit = int(limit) if limit is not None else None
+        page = max(int(page), 1)
+        per_page = int(per_page) if per_page is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid parameters'}), 400
+    
+    # NaN fails every comparison, so it is rejected here too
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return jsonify({'error': 'lat must be within -90..90 and lng within -180..180'}), 400
+    if not isfinite(radius) or radius <= 0:
+        return jsonify({'error': 'radius must be a positive number of km'}), 400
+    if limit is not None and limit < 1:
+        return jsonify({'error': 'limit must be at least 1'}), 400
+    if per_page is not None and per_page < 1:
+        return jsonify({'error': 'per_page must be at least 1'}), 400
+    
+    # Spatial-index lookup, sorted by haversine distance
+    nearby = find_nearby_clinics(lat, lng, radius, limit=limit)
+    total = len(nearby)
+    
+    if per_page:
+        start = (page - 1) * per_page
+        nearby = nearby[start:start + per_page]
     
     clinics_with_distance = []
-    for clinic in clinics:
+    for clinic, distance in nearby:
         clinic_dict = clinic.to_dict()
-        clinic_dict['distance'] = round(calc_distance(clinic), 2)
+        clinic_dict['distance'] = round(distance, 2)
         clinics_with_distance.append(clinic_dict)
     
-    # Sort by distance
-    clinics_with_distance.sort(key=lambda x: x['distance'])
+    result = {'clinics': clinics_with_distance, 'total': total}
+    if per_page:
+        result['current_page'] = page
+        result['has_next'] = page * per_page < total
     
-    return jsonify({'clinics': clinics_with_distance})
+    return jsonify(result)
 
 # Admin routes
 @clinic_bp.route('/add', methods=['POST'])
@@ -91,6 +116,7 @@ def add_clinic():
     
     db.session.add(clinic)
     db.session.commit()
+    response_cache.invalidate('clinics')
     
     return jsonify({
         'message': 'Clinic added',
@@ -113,12 +139,17 @@ def update_clinic(clinic_id):
             else:
                 setattr(clinic, field, data[field])
     
+    # Store the new image first; the old one is released in the same transaction and unlinked after it
+    old_image = None
     if request.files.get('image'):
-        if clinic.image:
-            delete_image(clinic.image)
-        clinic.image = save_image(request.files['image'])
+        image = save_image(request.files['image'])
+        if image:
+            old_image, clinic.image = clinic.image, image
     
+    if old_image:
+        delete_image(old_image)
     db.session.commit()
+    response_cache.invalidate('clinics')
     
     return jsonify({
         'message': 'Clinic updated',
@@ -136,5 +167,6 @@ def delete_clinic(clinic_id):
     
     db.session.delete(clinic)
     db.session.commit()
+    response_cache.invalidate('clinics')
     
     return jsonify({'message': 'Clinic deleted'})
@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Donation, User
-from utils import admin_required
+from flask_jwt_extended import jwt_required
+from models import db, Donation, User, DailyStat
+from utils import admin_required, response_cache, current_user_id
+from utils.etag import conditional
+from utils.replicas import read_only
+from utils.pagination import clamp_per_page
 from datetime import datetime, timedelta
 from sqlalchemy import func
 
@@ -20,7 +23,7 @@ def create_donation():
     try:
         from flask_jwt_extended import verify_jwt_in_request
         verify_jwt_in_request(optional=True)
-        user_id = get_jwt_identity()
+        user_id = current_user_id()
     except:
         pass
     
@@ -73,10 +76,14 @@ def payment_callback():
         donation.status = 'failed'
     
     db.session.commit()
+    response_cache.invalidate('donations')
     
     return jsonify({'message': 'Status updated'})
 
 @donation_bp.route('/public-stats', methods=['GET'])
+@read_only
+@conditional('donations')
+@response_cache.cached('donations')
 def public_stats():
     """Get public donation statistics"""
     total_donations = db.session.query(func.sum(Donation.amount))\
@@ -96,7 +103,9 @@ def public_stats():
 
 # Admin routes
 @donation_bp.route('/stats', methods=['GET'])
+@read_only
 @admin_required()
+@conditional('donations', daily=True)
 def admin_stats():
     """Get detailed donation statistics (admin only)"""
     # Time ranges
@@ -104,61 +113,48 @@ def admin_stats():
     week_ago = today - timedelta(days=7)
     month_ago = today - timedelta(days=30)
     
-    # Total stats
-    total_amount = db.session.query(func.sum(Donation.amount))\
-        .filter_by(status='completed').scalar() or 0
-    
-    # Today stats
-    today_amount = db.session.query(func.sum(Donation.amount))\
-        .filter(
-            Donation.status == 'completed',
-            func.date(Donation.created_at) == today
-        ).scalar() or 0
-    
-    # Week stats
-    week_amount = db.session.query(func.sum(Donation.amount))\
-        .filter(
-            Donation.status == 'completed',
-            func.date(Donation.created_at) >= week_ago
-        ).scalar() or 0
-    
-    # Month stats
-    month_amount = db.session.query(func.sum(Donation.amount))\
-        .filter(
-            Donation.status == 'completed',
-            func.date(Donation.created_at) >= month_ago
-        ).scalar() or 0
-    
-    # Count by status
-    status_counts = db.session.query(
-        Donation.status, func.count(Donation.id)
-    ).group_by(Donation.status).all()
-    
-    # Daily donations for chart (last 30 days)
-    daily_donations = db.session.query(
-        func.date(Donation.created_at).label('date'),
-        func.sum(Donation.amount).label('amount')
-    ).filter(
-        Donation.status == 'completed',
-        func.date(Donation.created_at) >= month_ago
-    ).group_by(func.date(Donation.created_at))\
-    .order_by(func.date(Donation.created_at)).all()
+    # Totals and counts by status, from the daily rollups
+    totals = db.session.query(
+        DailyStat.metric, func.sum(DailyStat.count), func.sum(DailyStat.amount)
+    ).filter(DailyStat.metric.like('donations:%'))\
+    .group_by(DailyStat.metric).all()
+    
+    total_amount = 0
+    status_counts = {}
+    for metric, count, amount in totals:
+        status = metric.split(':', 1)[1]
+        if count:
+            status_counts[status] = count
+        if status == 'completed':
+            total_amount = amount or 0
+    
+    # Completed donations per day for the last 30 days
+    daily_donations = DailyStat.query.filter(
+        DailyStat.metric == 'donations:completed',
+        DailyStat.day >= month_ago,
+        DailyStat.count > 0
+    ).order_by(DailyStat.day).all()
+    
+    def amount_since(since):
+        return sum(d.amount for d in daily_donations if d.day >= since)
     
     return jsonify({
         'total_amount': total_amount,
-        'today_amount': today_amount,
-        'week_amount': week_amount,
-        'month_amount': month_amount,
-        'status_counts': dict(status_counts),
-        'daily_donations': [{'date': str(d.date), 'amount': d.amount} for d in daily_donations]
+        'today_amount': amount_since(today),
+        'week_amount': amount_since(week_ago),
+        'month_amount': amount_since(month_ago),
+        'status_counts': status_counts,
+        'daily_donations': [{'date': str(d.day), 'amount': d.amount} for d in daily_donations]
     })
 
 @donation_bp.route('/all', methods=['GET'])
+@read_only
 @admin_required()
+@conditional('donations')
 def all_donations():
     """Get all donations (admin only)"""
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    per_page = clamp_per_page(request.args.get('per_page', type=int))
     status = request.args.get('status')
     
     query = Donation.query
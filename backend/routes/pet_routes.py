@@ -1,11 +1,23 @@
+import logging
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from models import db, Pet
-from utils import save_image, delete_image, admin_required
+from utils import (save_image, delete_image, admin_required, admin_token_required, view_counter, response_cache,
+                   is_admin, notifier, current_user_id)
+from utils.pagination import keyset_paginate, ranked_paginate, clamp_per_page, InvalidCursor
+from utils.search import search_pets, rank_pets
+from utils.etag import conditional, compute_etag, not_modified, with_etag
+from utils.fieldsets import requested_fields, load_fields, InvalidFields
+from utils.bulk import parse_ids, bulk_update, bulk_response, BulkError, MAX_BULK_IDS
+from utils.replicas import read_only
 
 pet_bp = Blueprint('pets', __name__)
+logger = logging.getLogger(__name__)
 
 @pet_bp.route('/list', methods=['GET'])
+@read_only
+@conditional('pets', 'users.full_name')
+@response_cache.cached('pets')
 def list_pets():
     """Get all approved pets with filters"""
     # Get query params
@@ -14,11 +26,18 @@ def list_pets():
     min_price = request.args.get('min_price', type=float)
     max_price = request.args.get('max_price', type=float)
     location = request.args.get('location')
+    q = request.args.get('q')
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 12, type=int)
-    
-    # Build query
+    per_page = clamp_per_page(request.args.get('per_page', type=int), 12)
+    cursor = request.args.get('cursor')
+    try:
+        fields = requested_fields(Pet)
+    except InvalidFields as e:
+        return jsonify({'error': f'Unknown fields: {e}'}), 400
+    
+    # Build query; ?fields= keeps unrequested columns such as description out of the SELECT
     query = Pet.query.filter_by(approved=True, is_active=True)
+    query = load_fields(query, Pet, fields, always=('created_at',))
     
     if pet_type:
         query = query.filter_by(pet_type=pet_type)
@@ -28,17 +47,20 @@ def list_pets():
         query = query.filter(Pet.price >= min_price)
     if max_price is not None:
         query = query.filter(Pet.price <= max_price)
-    if location:
-        query = query.filter(Pet.location.ilike(f'%{location}%'))
     
-    # Order by newest first
-    query = query.order_by(Pet.created_at.desc())
+    query = search_pets(query, q, location)
+    
+    # Cursor mode for infinite scroll: pass cursor= (empty for the first page).
+    # Results stay in (created_at, id) order there, so search only filters.
+    if cursor is not None:
+        return cursor_page(query, cursor, per_page, fields)
     
-    # Paginate
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    # Paginate: most relevant first, then newest first; the total counts the unranked query
+    ranked = rank_pets(query, q).order_by(Pet.created_at.desc())
+    pagination = ranked_paginate(query, ranked, page, per_page)
     
     return jsonify({
-        'pets': [pet.to_dict() for pet in pagination.items],
+        'pets': [pet.to_dict(fields) for pet in pagination.items],
         'total': pagination.total,
         'pages': pagination.pages,
         'current_page': page,
@@ -47,6 +69,9 @@ def list_pets():
     })
 
 @pet_bp.route('/featured', methods=['GET'])
+@read_only
+@conditional('pets', 'users.full_name')
+@response_cache.cached('pets')
 def featured_pets():
     """Get featured/latest pets for homepage"""
     pets = Pet.query.filter_by(approved=True, is_active=True)\
@@ -56,21 +81,31 @@ def featured_pets():
     return jsonify({'pets': [pet.to_dict() for pet in pets]})
 
 @pet_bp.route('/<int:pet_id>', methods=['GET'])
+@read_only
 def get_pet(pet_id):
     """Get single pet details"""
+    # A revalidated page still counts as a view
+    etag = compute_etag(('pets', 'users.full_name'))
+    cached = not_modified(etag)
+    if cached is not None:
+        view_counter.record(pet_id)
+        return cached
+    
     pet = Pet.query.get_or_404(pet_id)
     
-    # Increment views
-    pet.views += 1
-    db.session.commit()
+    # Views are buffered and flushed in batches, so this request stays read-only
+    view_counter.record(pet.id)
+    
+    pet_dict = pet.to_dict()
+    pet_dict['views'] = (pet.views or 0) + view_counter.pending(pet.id)
     
-    return jsonify({'pet': pet.to_dict()})
+    return with_etag(jsonify({'pet': pet_dict}), etag)
 
 @pet_bp.route('/add', methods=['POST'])
 @jwt_required(optional=True)
 def add_pet():
     """Add new pet listing"""
-    user_id = get_jwt_identity() or 1  # Default to admin user for demo
+    user_id = current_user_id() or 1  # Default to admin user for demo
     
     # Handle form data or JSON
     data = {}
@@ -78,15 +113,12 @@ def add_pet():
     
     # Check content type
     content_type = request.content_type or ''
-    print(f"Content-Type: {content_type}")
     
     if 'multipart/form-data' in content_type:
         data = request.form.to_dict()
         image_file = request.files.get('image')
-        print(f"Form data: {data}")
-        print(f"Image file: {image_file}")
-        if image_file:
-            print(f"Image filename: {image_file.filename}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('add_pet form', extra={'fields': sorted(data), 'has_image': bool(image_file)})
     else:
         try:
             data = request.get_json() or {}
@@ -122,6 +154,9 @@ def add_pet():
     
     db.session.add(pet)
     db.session.commit()
+    response_cache.invalidate('pets')
+    if pet.approved:
+        notifier.pets_approved([pet.id])
     
     return jsonify({
         'message': 'Pet listing created. Awaiting admin approval.',
@@ -132,13 +167,11 @@ def add_pet():
 @jwt_required()
 def update_pet(pet_id):
     """Update pet listing"""
-    user_id = get_jwt_identity()
+    user_id = current_user_id()
     pet = Pet.query.get_or_404(pet_id)
     
     # Check ownership or admin
-    from models import User
-    user = User.query.get(user_id)
-    if pet.user_id != user_id and user.role != 'admin':
+    if pet.user_id != user_id and not is_admin(user_id):
         return jsonify({'error': 'Unauthorized'}), 403
     
     data = request.get_json() if request.is_json else request.form.to_dict()
@@ -152,13 +185,17 @@ def update_pet(pet_id):
             else:
                 setattr(pet, field, data[field])
     
-    # Handle image update
+    # Handle image update: store the new image first, release the old one in the same transaction
+    old_image = None
     if request.files.get('image'):
-        if pet.image:
-            delete_image(pet.image)
-        pet.image = save_image(request.files['image'])
+        image = save_image(request.files['image'])
+        if image:
+            old_image, pet.image = pet.image, image
     
+    if old_image:
+        delete_image(old_image)
     db.session.commit()
+    response_cache.invalidate('pets')
     
     return jsonify({
         'message': 'Pet updated',
@@ -169,13 +206,11 @@ def update_pet(pet_id):
 @jwt_required()
 def delete_pet(pet_id):
     """Delete pet listing"""
-    user_id = get_jwt_identity()
+    user_id = current_user_id()
     pet = Pet.query.get_or_404(pet_id)
     
     # Check ownership or admin
-    from models import User
-    user = User.query.get(user_id)
-    if pet.user_id != user_id and user.role != 'admin':
+    if pet.user_id != user_id and not is_admin(user_id):
         return jsonify({'error': 'Unauthorized'}), 403
     
     # Delete image
@@ -184,21 +219,32 @@ def delete_pet(pet_id):
     
     db.session.delete(pet)
     db.session.commit()
+    response_cache.invalidate('pets')
     
     return jsonify({'message': 'Pet deleted'})
 
 @pet_bp.route('/my', methods=['GET'])
+@read_only
 @jwt_required()
+@conditional('pets', 'users.full_name', per_user=True)
 def my_pets():
     """Get current user's pets"""
-    user_id = get_jwt_identity()
-    pets = Pet.query.filter_by(user_id=user_id).order_by(Pet.created_at.desc()).all()
+    user_id = current_user_id()
+    try:
+        fields = requested_fields(Pet)
+    except InvalidFields as e:
+        return jsonify({'error': f'Unknown fields: {e}'}), 400
     
-    return jsonify({'pets': [pet.to_dict() for pet in pets]})
+    query = load_fields(Pet.query.filter_by(user_id=user_id), Pet, fields)
+    pets = query.order_by(Pet.created_at.desc()).all()
+    
+    return jsonify({'pets': [pet.to_dict(fields) for pet in pets]})
 
 # Admin routes
 @pet_bp.route('/pending', methods=['GET'])
+@read_only
 @admin_required()
+@conditional('pets', 'users.full_name')
 def pending_pets():
     """Get pets pending approval (admin only)"""
     pets = Pet.query.filter_by(approved=False, is_active=True)\
@@ -211,8 +257,12 @@ def pending_pets():
 def approve_pet(pet_id):
     """Approve pet listing (admin only)"""
     pet = Pet.query.get_or_404(pet_id)
+    newly_approved = not pet.approved
     pet.approved = True
     db.session.commit()
+    response_cache.invalidate('pets')
+    if newly_approved:
+        notifier.pets_approved([pet.id])
     
     return jsonify({
         'message': 'Pet approved',
@@ -226,15 +276,34 @@ def reject_pet(pet_id):
     pet = Pet.query.get_or_404(pet_id)
     pet.is_active = False
     db.session.commit()
+    response_cache.invalidate('pets')
     
     return jsonify({'message': 'Pet rejected'})
 
+@pet_bp.route('/bulk/approve', methods=['POST'])
+@admin_token_required()
+def bulk_approve_pets():
+    """Approve many listings at once: {"ids": [...]} or {"filter": {...}} (admin only)"""
+    return bulk_moderate({'approved': True})
+
+@pet_bp.route('/bulk/reject', methods=['POST'])
+@admin_token_required()
+def bulk_reject_pets():
+    """Reject many listings at once: {"ids": [...]} or {"filter": {...}} (admin only)"""
+    return bulk_moderate({'is_active': False})
+
 @pet_bp.route('/all', methods=['GET'])
+@read_only
 @admin_required()
+@conditional('pets', 'users.full_name')
 def all_pets():
     """Get all pets including unapproved (admin only)"""
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    per_page = clamp_per_page(request.args.get('per_page', type=int))
+    cursor = request.args.get('cursor')
+    
+    if cursor is not None:
+        return cursor_page(Pet.query, cursor, per_page)
     
     pagination = Pet.query.order_by(Pet.created_at.desc())\
         .paginate(page=page, per_page=per_page, error_out=False)
@@ -245,3 +314,48 @@ def all_pets():
         'pages': pagination.pages,
         'current_page': page
     })
+
+def cursor_page(query, cursor, per_page, fields=None):
+    """Keyset page of pets; total is only counted when include_total=1"""
+    try:
+        pets, next_cursor = keyset_paginate(query, Pet, cursor, per_page)
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    result = {
+        'pets': [pet.to_dict(fields) for pet in pets],
+        'next_cursor': next_cursor,
+        'has_next': next_cursor is not None
+    }
+    if request.args.get('include_total', type=int):
+        result['total'] = query.order_by(None).count()
+    
+    return jsonify(result)
+
+def bulk_moderate(values):
+    """Apply a moderation change to listed ids, or to pending pets matching a filter"""
+    data = request.get_json(silent=True) or {}
+    try:
+        if 'filter' in data:
+            ids = pending_ids(data['filter'])
+        else:
+            ids = parse_ids(data)
+    except BulkError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    results, updated = bulk_update(Pet, ids, values)
+    if updated:
+        response_cache.invalidate('pets')
+        if values.get('approved'):
+            notifier.pets_approved(updated)
+    
+    return jsonify(bulk_response(results, updated))
+
+def pending_ids(criteria):
+    """Oldest pending pet ids matching pet_type/status/user_id, up to MAX_BULK_IDS"""
+    if not isinstance(criteria, dict) or set(criteria) - {'pet_type', 'status', 'user_id'}:
+        raise BulkError('filter may only contain pet_type, status and user_id')
+    query = Pet.query.with_entities(Pet.id)\
+        .filter_by(approved=False, is_active=True, **criteria)\
+        .order_by(Pet.created_at, Pet.id).limit(MAX_BULK_IDS)
+    return [pet_id for (pet_id,) in query]
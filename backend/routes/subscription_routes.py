@@ -0,0 +1,67 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from models import db, User, Subscription
+from utils import current_user_id
+from utils.replicas import read_only
+
+subscription_bp = Blueprint('subscriptions', __name__)
+
+@subscription_bp.route('/list', methods=['GET'])
+@read_only
+@jwt_required()
+def list_subscriptions():
+    """Get current user's saved searches"""
+    user_id = current_user_id()
+    subscriptions = Subscription.query.filter_by(user_id=user_id)\
+        .order_by(Subscription.created_at.desc()).all()
+    
+    return jsonify({'subscriptions': [s.to_dict() for s in subscriptions]})
+
+@subscription_bp.route('/add', methods=['POST'])
+@jwt_required()
+def add_subscription():
+    """Save a search; new matching pets are sent to the user's Telegram"""
+    user_id = current_user_id()
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        min_price = float(data['min_price']) if data.get('min_price') not in (None, '') else None
+        max_price = float(data['max_price']) if data.get('max_price') not in (None, '') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'min_price and max_price must be numbers'}), 400
+    if min_price is not None and max_price is not None and min_price > max_price:
+        return jsonify({'error': 'min_price is greater than max_price'}), 400
+    
+    limit = current_app.config['MAX_SUBSCRIPTIONS_PER_USER']
+    if Subscription.query.filter_by(user_id=user_id).count() >= limit:
+        return jsonify({'error': f'At most {limit} saved searches per user'}), 400
+    
+    subscription = Subscription(
+        user_id=user_id,
+        pet_type=Subscription.normalize(data.get('pet_type')),
+        status=Subscription.normalize(data.get('status')),
+        location=Subscription.normalize(data.get('location')),
+        min_price=min_price,
+        max_price=max_price
+    )
+    db.session.add(subscription)
+    db.session.commit()
+    
+    user = db.session.get(User, user_id)
+    return jsonify({
+        'message': 'Subscription created',
+        'subscription': subscription.to_dict(),
+        # Notifications only reach accounts linked to Telegram
+        'telegram_linked': bool(user and user.telegram_id)
+    }), 201
+
+@subscription_bp.route('/<int:subscription_id>', methods=['DELETE'])
+@jwt_required()
+def delete_subscription(subscription_id):
+    """Delete one of the current user's saved searches"""
+    user_id = current_user_id()
+    subscription = Subscription.query.filter_by(id=subscription_id, user_id=user_id).first_or_404()
+    db.session.delete(subscription)
+    db.session.commit()
+    
+    return jsonify({'message': 'Subscription deleted'})
@@ -0,0 +1,92 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configured before the app module builds its app
+_tmp = tempfile.mkdtemp(prefix='pet-tashkent-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_tmp, 'test.db')
+
+import config
+config.Config.UPLOAD_FOLDER = os.path.join(_tmp, 'uploads')
+config.Config.CACHE_BACKEND = 'none'  # Every request must reach the database
+config.Config.PASSWORD_HASH_WORKERS = 0
+config.Config.SLOW_QUERY_MS = 0
+
+from app import app as flask_app
+from models import db, User, Pet, Donation
+
+@pytest.fixture(scope='session')
+def app():
+    return flask_app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def add_rows(users=5, pets_per_user=4, donations=10):
+    """Add users with pets and donations spread over the last days"""
+    start = datetime.utcnow() - timedelta(days=10)
+    offset = User.query.count()
+    for i in range(users):
+        user = User(full_name=f'User {offset + i}', email=f'user{offset + i}@example.com', role='user',
+                    created_at=start + timedelta(hours=i))
+        user.set_unusable_password()
+        db.session.add(user)
+        for j in range(pets_per_user):
+            db.session.add(Pet(
+                owner=user, name=f'Pet {j}', pet_type='dog' if j % 2 else 'cat', status='free',
+                location='Chilonzor', description='friendly and calm', approved=j % 3 != 0,
+                created_at=start + timedelta(hours=i, minutes=j)
+            ))
+    for k in range(donations):
+        db.session.add(Donation(amount=1000 * (k + 1), status='completed' if k % 4 else 'pending',
+                                created_at=start + timedelta(hours=k)))
+    db.session.commit()
+
+@pytest.fixture
+def seed(app):
+    with app.app_context():
+        yield add_rows
+
+def bearer(user):
+    from utils import create_token
+    return {'Authorization': f'Bearer {create_token(user)}'}
+
+@pytest.fixture
+def admin_headers(app):
+    with app.app_context():
+        return bearer(User.query.filter_by(role='admin').first())
+
+@pytest.fixture
+def user_headers(app):
+    """Token for a plain (non-admin) user"""
+    with app.app_context():
+        user = User.query.filter_by(email='plain@example.com').first()
+        if user is None:
+            user = User(full_name='Plain User', email='plain@example.com', role='user')
+            user.set_unusable_password()
+            db.session.add(user)
+            db.session.commit()
+        return bearer(user)
+
+@contextmanager
+def count_statements(app):
+    """Collects the SQL statements run by the app's engine inside the block"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
@@ -0,0 +1,30 @@
+def login(client, email, password):
+    response = client.post('/api/auth/login', json={'email': email, 'password': password})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return {'Authorization': f"Bearer {response.json['token']}"}
+
+def register(client, email):
+    response = client.post('/api/auth/register', json={
+        'full_name': 'Token Owner', 'email': email, 'password': 'secret123'
+    })
+    assert response.status_code == 201, response.get_data(as_text=True)
+
+def test_login_token_works_on_me(client):
+    headers = login(client, 'admin@pettashkent.uz', 'admin123')
+    response = client.get('/api/auth/me', headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert response.json['user']['role'] == 'admin'
+
+def test_owner_can_delete_own_pet(client):
+    register(client, 'owner@example.com')
+    headers = login(client, 'owner@example.com', 'secret123')
+    pet = client.post('/api/pets/add', headers=headers, json={
+        'name': 'Mine', 'pet_type': 'cat', 'status': 'free'
+    }).json['pet']
+    assert client.get('/api/auth/me', headers=headers).json['user']['id'] == pet['user_id']
+    assert client.delete(f"/api/pets/{pet['id']}", headers=headers).status_code == 200
+
+def test_user_token_is_refused_by_admin_routes(client):
+    register(client, 'notadmin@example.com')
+    headers = login(client, 'notadmin@example.com', 'secret123')
+    assert client.get('/api/admin/users', headers=headers).status_code == 403
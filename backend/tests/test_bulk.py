@@ -0,0 +1,41 @@
+import pytest
+from models import db, User, Pet
+
+BULK_ENDPOINTS = ['/api/pets/bulk/approve', '/api/pets/bulk/reject',
+                  '/api/admin/users/bulk/ban', '/api/admin/users/bulk/unban']
+
+@pytest.fixture
+def victims(app):
+    with app.app_context():
+        user = User(full_name='Bulk Target', email=f'bulk{User.query.count()}@example.com', role='user')
+        user.set_unusable_password()
+        pet = Pet(owner=user, name='Bulk pet', pet_type='dog', status='free', approved=False)
+        db.session.add_all([user, pet])
+        db.session.commit()
+        return user.id, pet.id
+
+@pytest.mark.parametrize('url', BULK_ENDPOINTS)
+def test_bulk_requires_token(client, victims, url):
+    user_id, pet_id = victims
+    ids = [pet_id] if '/pets/' in url else [user_id]
+    assert client.post(url, json={'ids': ids}).status_code == 401
+
+@pytest.mark.parametrize('url', BULK_ENDPOINTS)
+def test_bulk_refuses_non_admin(client, victims, user_headers, url):
+    user_id, pet_id = victims
+    ids = [pet_id] if '/pets/' in url else [user_id]
+    assert client.post(url, json={'ids': ids}, headers=user_headers).status_code == 403
+
+def test_anonymous_ban_changes_nothing(app, client, victims):
+    user_id, _ = victims
+    client.post('/api/admin/users/bulk/ban', json={'ids': [user_id]})
+    with app.app_context():
+        assert not db.session.get(User, user_id).is_banned
+
+def test_admin_can_bulk_ban_and_approve(app, client, victims, admin_headers):
+    user_id, pet_id = victims
+    assert client.post('/api/admin/users/bulk/ban', json={'ids': [user_id]}, headers=admin_headers).status_code == 200
+    assert client.post('/api/pets/bulk/approve', json={'ids': [pet_id]}, headers=admin_headers).status_code == 200
+    with app.app_context():
+        assert db.session.get(User, user_id).is_banned
+        assert db.session.get(Pet, pet_id).approved
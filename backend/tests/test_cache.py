@@ -0,0 +1,29 @@
+from utils.cache import ResponseCache, MemoryBackend
+
+def make_cache():
+    cache = ResponseCache()
+    cache.backend = MemoryBackend()
+    return cache
+
+def test_key_keeps_empty_args(app):
+    cache = make_cache()
+    with app.test_request_context('/api/pets/list'):
+        page = cache.make_key(('pets',))
+    with app.test_request_context('/api/pets/list?cursor='):
+        cursor = cache.make_key(('pets',))
+    assert page != cursor
+
+def test_key_ignores_arg_order(app):
+    cache = make_cache()
+    with app.test_request_context('/api/pets/list?type=dog&page=2'):
+        first = cache.make_key(('pets',))
+    with app.test_request_context('/api/pets/list?page=2&type=dog'):
+        second = cache.make_key(('pets',))
+    assert first == second
+
+def test_invalidate_changes_key(app):
+    cache = make_cache()
+    with app.test_request_context('/api/pets/list'):
+        before = cache.make_key(('pets', 'users'))
+        cache.invalidate('pets')
+        assert cache.make_key(('pets', 'users')) != before
@@ -0,0 +1,56 @@
+import pytest
+from models import db, Clinic
+
+# Far from the sample clinics in Tashkent
+ORIGIN = {'lat': 10.0, 'lng': 10.0}
+
+@pytest.fixture
+def clinics(app):
+    with app.app_context():
+        if not Clinic.query.filter_by(name='Near clinic').first():
+            # About 2 km and 20 km north of ORIGIN
+            db.session.add(Clinic(name='Near clinic', address='1', lat=10.018, lng=10.0))
+            db.session.add(Clinic(name='Far clinic', address='2', lat=10.18, lng=10.0))
+            db.session.commit()
+
+def near(client, **params):
+    return client.post('/api/clinics/near', json={**ORIGIN, **params})
+
+def test_radius_only_returns_clinics_inside_it(client, clinics):
+    response = near(client, radius=5)
+    assert [c['name'] for c in response.json['clinics']] == ['Near clinic']
+
+def test_limit_widens_radius_until_enough_found(client, clinics):
+    response = near(client, radius=1, limit=2)
+    assert response.status_code == 200
+    clinics = response.json['clinics']
+    assert [c['name'] for c in clinics] == ['Near clinic', 'Far clinic']
+    assert 19 < clinics[1]['distance'] < 21
+
+def test_limit_stops_at_max_radius(client, clinics):
+    response = near(client, radius=1, limit=10)
+    assert [c['name'] for c in response.json['clinics']] == ['Near clinic', 'Far clinic']
+
+@pytest.mark.parametrize('params', [
+    {'radius': 0, 'limit': 1},
+    {'radius': -3, 'limit': 1},
+    {'radius': 'nan', 'limit': 1},
+    {'radius': 'inf'},
+    {'radius': 5, 'limit': 0},
+    {'radius': 5, 'limit': -1},
+    {'radius': 5, 'per_page': 0},
+    {'lat': 91},
+    {'lng': -181},
+    {'lat': 'nan'},
+])
+def test_invalid_parameters_rejected(client, clinics, params):
+    response = near(client, **params)
+    assert response.status_code == 400
+    assert response.json['error']
+
+@pytest.mark.parametrize('radius', [0, -1, float('nan')])
+def test_widening_terminates_from_degenerate_radius(app, clinics, radius):
+    from utils.geo import find_nearby_clinics
+    with app.app_context():
+        found = find_nearby_clinics(ORIGIN['lat'], ORIGIN['lng'], radius, limit=1)
+        assert [clinic.name for clinic, distance in found] == ['Near clinic']
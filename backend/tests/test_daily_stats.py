@@ -0,0 +1,64 @@
+from conftest import count_statements
+from models import db, User, Pet, Donation, DailyStat
+
+def rollups():
+    """Non-empty rollup rows; zeroed rows left behind by deletes count as absent"""
+    return sorted((r.day, r.metric, r.count, round(r.amount, 2))
+                  for r in DailyStat.query.all() if r.count or r.amount)
+
+def rebuilt():
+    DailyStat.rebuild(db.session.connection())
+    db.session.commit()
+    return rollups()
+
+def test_rollups_match_rebuild_after_deletes(app, client, seed):
+    seed(users=3, donations=4)
+    user = User.query.filter_by(role='user').order_by(User.id.desc()).first()
+    db.session.add(Donation(amount=2500, status='completed', donor=user))
+    db.session.commit()
+
+    # One pet through the ORM, the rest of the user's pets through the bulk delete in delete_user
+    db.session.delete(Pet.query.filter_by(user_id=user.id).first())
+    db.session.commit()
+    assert client.delete(f'/api/admin/users/{user.id}').status_code == 200
+
+    Donation.query.filter_by(status='pending').delete()
+    db.session.delete(Donation.query.first())
+    db.session.commit()
+
+    incremental = rollups()
+    assert incremental == rebuilt()
+
+def test_rollups_follow_moderation(app, client, seed, admin_headers):
+    seed(users=2)
+    pending = [p.id for p in Pet.query.filter_by(approved=False, is_active=True)]
+    active = [p.id for p in Pet.query.filter_by(approved=True, is_active=True)]
+
+    assert client.post(f'/api/pets/{pending[0]}/approve').status_code == 200
+    assert client.post(f'/api/pets/{active[0]}/reject').status_code == 200
+    assert client.post('/api/pets/bulk/approve', headers=admin_headers, json={'ids': pending[1:]}).status_code == 200
+    assert client.post('/api/pets/bulk/reject', headers=admin_headers, json={'ids': active[1:3]}).status_code == 200
+    pet = db.session.get(Pet, active[3])
+    pet.is_active = False
+    db.session.commit()
+    pet.approved, pet.is_active = False, True
+    db.session.commit()
+    Pet.query.filter(Pet.id == active[-1]).delete()
+    db.session.commit()
+
+    incremental = rollups()
+    assert incremental == rebuilt()
+
+def test_dashboard_totals_come_from_rollups(app, client, seed):
+    seed(users=3)
+    with count_statements(app) as statements:
+        stats = client.get('/api/admin/dashboard').json['stats']
+    # ETag versions, last week's rollups, all-time totals, clinics, recent pets and donations
+    assert len(statements) == 6
+    assert stats['users']['total'] == User.query.count()
+    assert stats['pets'] == {
+        'total': Pet.query.count(),
+        'active': Pet.query.filter_by(approved=True, is_active=True).count(),
+        'pending': Pet.query.filter_by(approved=False, is_active=True).count(),
+        'today': stats['pets']['today']
+    }
@@ -0,0 +1,60 @@
+from conftest import count_statements
+from models import db, User, Pet, DataVersion
+from utils import view_counter
+
+def test_view_flush_keeps_etag(app, client, seed):
+    seed(users=1)
+    pet = Pet.query.filter_by(approved=True).first()
+    etag = client.get('/api/pets/list').headers['ETag']
+
+    view_counter.record(pet.id)
+    assert view_counter.flush() == 1
+    db.session.refresh(pet)
+    assert pet.views >= 1
+
+    assert client.get('/api/pets/list', headers={'If-None-Match': etag}).status_code == 304
+
+def test_other_pet_updates_change_etag(app, client, seed):
+    seed(users=1)
+    before = DataVersion.get(['pets'])
+    etag = client.get('/api/pets/list').headers['ETag']
+
+    Pet.query.filter_by(approved=False).update({'approved': True})
+    db.session.commit()
+
+    assert DataVersion.get(['pets']) != before
+    assert client.get('/api/pets/list', headers={'If-None-Match': etag}).status_code == 200
+
+def test_empty_args_are_part_of_etag(client):
+    page = client.get('/api/pets/list').headers['ETag']
+    cursor = client.get('/api/pets/list?cursor=').headers['ETag']
+    assert page != cursor
+
+def test_user_writes_only_touch_owner_names_when_renamed(app, client, seed):
+    seed(users=1)
+    owner = Pet.query.filter_by(approved=True).first().owner
+    etag = client.get('/api/pets/list').headers['ETag']
+
+    owner.phone = '+998900000000'
+    db.session.commit()
+    assert client.get('/api/pets/list', headers={'If-None-Match': etag}).status_code == 304
+
+    User.query.filter_by(id=owner.id).update({'full_name': 'Renamed Owner'})
+    db.session.commit()
+    assert client.get('/api/pets/list', headers={'If-None-Match': etag}).status_code == 200
+
+def test_versions_are_bumped_after_commit(app, seed):
+    seed(users=1)
+    before = DataVersion.get(['pets'])
+    with count_statements(app) as statements:
+        Pet.query.filter_by(approved=False).update({'approved': True})
+        db.session.flush()
+        written = list(statements)
+        db.session.commit()
+    # Nothing in the writer's own transaction touches the shared version rows
+    assert not any('data_versions' in statement for statement in written)
+    assert DataVersion.get(['pets']) == [before[0] + 1]
+
+    Pet.query.update({'views': Pet.views})
+    db.session.rollback()
+    assert DataVersion.get(['pets']) == [before[0] + 1]
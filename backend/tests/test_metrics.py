@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from models import db
+from utils import metrics
+
+OUTSIDE = {'REMOTE_ADDR': '203.0.113.7'}
+
+def test_metrics_refused_from_outside(client):
+    assert client.get('/api/metrics', environ_base=OUTSIDE).status_code == 403
+
+def test_metrics_refused_through_proxy(client):
+    response = client.get('/api/metrics', headers={'X-Forwarded-For': '203.0.113.7'})
+    assert response.status_code == 403
+
+def test_metrics_served_locally_or_with_token(client, monkeypatch):
+    assert client.get('/api/metrics').status_code == 200
+
+    monkeypatch.setattr(metrics, 'token', 'scrape-secret')
+    assert client.get('/api/metrics', environ_base=OUTSIDE,
+                      headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    response = client.get('/api/metrics', environ_base=OUTSIDE,
+                          headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+    assert 'http_requests_total' in response.get_data(as_text=True)
+
+def test_failed_statements_leave_no_timing_state(app):
+    with app.app_context():
+        connection = db.session.connection()
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.execute(text('SELECT * FROM no_such_table'))
+            db.session.rollback()
+            connection = db.session.connection()
+        connection.execute(text('SELECT 1'))
+        assert not [value for value in connection.info.values() if isinstance(value, list) and value]
+        db.session.rollback()
@@ -0,0 +1,63 @@
+import pytest
+from models import db, User, Pet, Subscription
+from utils import notifier
+
+@pytest.fixture
+def sent(app, monkeypatch):
+    """Telegram stubbed out: messages land in the returned list"""
+    messages = []
+    monkeypatch.setattr(notifier, 'token', 'test-token')
+    monkeypatch.setattr(notifier, 'rate', 1000)
+    monkeypatch.setattr(notifier, '_ensure_worker', lambda: None)
+    monkeypatch.setattr(notifier, 'send_message', lambda chat_id, text: messages.append((chat_id, text)) or True)
+    with app.app_context():
+        yield messages
+
+def subscriber(telegram_id, **criteria):
+    user = User(full_name=f'Subscriber {telegram_id}', email=f'sub{telegram_id}@example.com', role='user',
+                telegram_id=telegram_id)
+    user.set_unusable_password()
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(Subscription(user_id=user.id, **{
+        key: Subscription.normalize(value) for key, value in criteria.items()
+    }))
+    db.session.commit()
+    return telegram_id
+
+def pending_pet(location, **fields):
+    owner = User.query.filter_by(role='admin').first()
+    pet = Pet(user_id=owner.id, name='Tom', pet_type='cat', status='free', location=location,
+              approved=False, **fields)
+    db.session.add(pet)
+    db.session.commit()
+    return pet
+
+def test_location_matches_by_containment(sent):
+    district = subscriber(9001, location='Chilonzor')
+    anywhere = subscriber(9002)
+    other = subscriber(9003, location='Yunusobod')
+    dogs = subscriber(9004, pet_type='dog', location='chilonzor')
+    pet = pending_pet('Toshkent, Chilonzor tumani')
+
+    assert notifier.match([pet.id]) == {}  # Only approved pets are announced
+
+    pet.approved = True
+    db.session.commit()
+    recipients = notifier.match([pet.id])
+    assert district in recipients and anywhere in recipients
+    assert other not in recipients and dogs not in recipients
+
+def test_approval_dispatches_merged_messages(client, admin_headers, sent):
+    chat = subscriber(9101, location='sergeli')
+    first = pending_pet('Sergeli 5')
+    second = pending_pet('Sergeli, 7-mavze', price=500000)
+    unrelated = pending_pet('Olmazor')
+
+    assert client.post('/api/pets/bulk/approve', json={'ids': [first.id, second.id, unrelated.id]},
+                       headers=admin_headers).status_code == 200
+    assert notifier.dispatch() == len(sent)
+    # One message for both matching pets
+    [text] = [text for chat_id, text in sent if chat_id == chat]
+    assert 'Sergeli 5' in text and 'Sergeli, 7-mavze' in text and 'Olmazor' not in text
+    assert notifier.dispatch() == 0
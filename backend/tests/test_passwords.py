@@ -0,0 +1,55 @@
+import threading
+import time
+import pytest
+from flask import Flask
+from werkzeug.exceptions import ServiceUnavailable
+from utils.passwords import PasswordHasher
+
+@pytest.fixture
+def pool_app():
+    """App with a one-process hashing pool and no queue"""
+    app = Flask(__name__)
+    app.config.update(PASSWORD_HASH_METHOD='pbkdf2:sha256:1000', PASSWORD_HASH_WORKERS=1,
+                      PASSWORD_HASH_QUEUE=0, PASSWORD_HASH_TIMEOUT=5)
+    hasher = PasswordHasher(app)
+    yield app
+    if hasher._executor is not None:
+        hasher._executor.shutdown()
+
+@pytest.fixture
+def hasher(pool_app):
+    return pool_app.extensions['password_hasher']
+
+def test_no_pool_outside_requests(hasher):
+    # e.g. the admin seed in create_app, before gunicorn forks
+    assert hasher.verify(hasher.hash('secret'), 'secret')
+    assert hasher._executor is None
+
+def test_pool_created_once_per_process(hasher):
+    pools = []
+    threads = [threading.Thread(target=lambda: pools.append(hasher._ensure_pool())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(executor) for executor, slots in pools}) == 1
+
+def test_pool_does_not_fork_the_worker(pool_app, hasher):
+    with pool_app.test_request_context():
+        assert hasher.verify(hasher.hash('secret'), 'secret')
+    executor, slots = hasher._ensure_pool()
+    assert executor._mp_context.get_start_method() in ('forkserver', 'spawn')
+
+def test_saturated_pool_fails_fast(pool_app, hasher):
+    with pool_app.test_request_context():
+        assert hasher.verify(hasher.hash('secret'), 'secret')
+        executor, slots = hasher._ensure_pool()
+        assert slots.acquire(blocking=False)  # Take the only slot
+        try:
+            start = time.monotonic()
+            with pytest.raises(ServiceUnavailable):
+                hasher.hash('secret')
+            assert time.monotonic() - start < 1
+        finally:
+            slots.release()
+        assert hasher.verify(hasher.hash('secret'), 'secret')
@@ -0,0 +1,26 @@
+import logging
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from utils.profiling import SlowQueryLog
+
+@pytest.fixture
+def engine():
+    app = Flask(__name__)
+    app.config.update(SLOW_QUERY_MS=0.001)
+    engine = create_engine('sqlite://')
+    SlowQueryLog(app).instrument_engine(engine)
+    yield engine
+    engine.dispose()
+
+def test_failed_statements_leave_no_timing_state(engine, caplog):
+    with engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.execute(text('SELECT * FROM no_such_table'))
+            connection.rollback()
+        with caplog.at_level(logging.WARNING, logger='utils.profiling'):
+            connection.execute(text('SELECT 1'))
+        assert not [value for value in connection.info.values() if isinstance(value, list) and value]
+    assert any(record.sql == 'SELECT 1' for record in caplog.records)
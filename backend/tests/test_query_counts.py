@@ -0,0 +1,38 @@
+"""Statements per request for the hot endpoints.
+
+The counts must not grow with the number of rows (no N+1), and a change
+that adds queries to one of these endpoints should be deliberate: update
+the expected number here together with it.
+"""
+import pytest
+from conftest import count_statements
+
+# endpoint -> statements for one uncached request (ETag version lookup included)
+EXPECTED_STATEMENTS = {
+    '/api/pets/list': 3,
+    '/api/pets/list?cursor=': 2,
+    '/api/pets/list?type=dog&q=friendly': 3,
+    '/api/pets/1': 2,
+    '/api/pets/pending': 2,
+    '/api/pets/all': 3,
+    '/api/admin/dashboard': 6,
+    '/api/admin/users': 3,
+    '/api/donations/stats': 3,
+}
+
+def statements_for(app, client, url):
+    with count_statements(app) as statements:
+        response = client.get(url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return len(statements)
+
+@pytest.mark.parametrize('url', EXPECTED_STATEMENTS)
+def test_statement_count(app, client, seed, url):
+    seed()
+    client.get(url)  # Warm per-process lookups such as the FTS table check
+
+    assert statements_for(app, client, url) == EXPECTED_STATEMENTS[url]
+
+    # Independent of how many rows there are
+    seed(users=10)
+    assert statements_for(app, client, url) == EXPECTED_STATEMENTS[url]
@@ -0,0 +1,46 @@
+"""The catalog, moderation queue and per-user queries must be index lookups, not table scans"""
+import pytest
+from models import db, Pet, Donation
+
+def query_plan(query):
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    return [row[3] for row in db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql))]
+
+QUERIES = {
+    'catalog': (
+        lambda: Pet.query.filter_by(approved=True, is_active=True).order_by(Pet.created_at.desc()),
+        'ix_pets_catalog'
+    ),
+    'catalog_by_type': (
+        lambda: Pet.query.filter_by(approved=True, is_active=True, pet_type='dog').order_by(Pet.created_at.desc()),
+        'ix_pets_catalog_type'
+    ),
+    'catalog_by_status': (
+        lambda: Pet.query.filter_by(approved=True, is_active=True, status='free').order_by(Pet.created_at.desc()),
+        'ix_pets_catalog_status'
+    ),
+    'pending_queue': (
+        lambda: Pet.query.filter_by(approved=False, is_active=True).order_by(Pet.created_at.desc()),
+        'ix_pets_catalog'
+    ),
+    'my_pets': (
+        lambda: Pet.query.filter_by(user_id=1).order_by(Pet.created_at.desc()),
+        'ix_pets_user_created'
+    ),
+    'user_donations': (
+        lambda: Donation.query.filter_by(user_id=1),
+        'ix_donations_user_id'
+    ),
+}
+
+@pytest.mark.parametrize('name', QUERIES)
+def test_uses_index(app, name):
+    build, index = QUERIES[name]
+    with app.app_context():
+        plan = query_plan(build())
+
+    pets_or_donations = [step for step in plan if ' pets' in step or ' donations' in step]
+    assert any(step.startswith('SEARCH') and f'USING INDEX {index}' in step for step in pets_or_donations), plan
+    assert not any(step.startswith('SCAN') for step in pets_or_donations), plan
+    # The index order serves ORDER BY too
+    assert not any('TEMP B-TREE' in step for step in plan), plan
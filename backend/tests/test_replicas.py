@@ -0,0 +1,57 @@
+import sqlite3
+import pytest
+from sqlalchemy import create_engine
+from models import db
+from utils.cache import MemoryBackend
+from utils.replicas import replica_router, STICKY_COOKIE
+
+@pytest.fixture
+def replica(app, tmp_path, monkeypatch):
+    """A lagging replica: a snapshot of the test database taken now"""
+    path = tmp_path / 'replica.db'
+    with app.app_context():
+        source = sqlite3.connect(db.engine.url.database)
+        target = sqlite3.connect(path)
+        source.backup(target)
+        source.close()
+        target.close()
+        engine = create_engine(f'sqlite:///{path}')
+        db.engines['replica_test'] = engine
+    monkeypatch.setattr(replica_router, 'replica_keys', ['replica_test'])
+    monkeypatch.setattr(replica_router, 'backend', MemoryBackend(16))
+    yield engine
+    with app.app_context():
+        del db.engines['replica_test']
+    engine.dispose()
+
+def my_pet_names(client, headers):
+    response = client.get('/api/pets/my', headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return {pet['name'] for pet in response.json['pets']}
+
+def test_reads_after_write_stay_on_primary_across_workers(client, user_headers, replica):
+    response = client.post('/api/pets/add', headers=user_headers, json={
+        'name': 'Fresh', 'pet_type': 'cat', 'status': 'free'
+    })
+    assert response.status_code == 201, response.get_data(as_text=True)
+    assert STICKY_COOKIE in response.headers.get('Set-Cookie', '')
+
+    # Another worker: nothing in its local marker store, only the cookie
+    replica_router.backend = MemoryBackend(16)
+    assert 'Fresh' in my_pet_names(client, user_headers)
+
+def test_reads_without_marker_use_replica(app, client, user_headers, replica):
+    client.post('/api/pets/add', headers=user_headers, json={
+        'name': 'Lagging', 'pet_type': 'dog', 'status': 'free'
+    })
+    replica_router.backend = MemoryBackend(16)
+    assert 'Lagging' not in my_pet_names(app.test_client(), user_headers)
+
+def test_forged_marker_is_ignored(app, client, user_headers, replica):
+    client.post('/api/pets/add', headers=user_headers, json={
+        'name': 'Forged', 'pet_type': 'dog', 'status': 'free'
+    })
+    replica_router.backend = MemoryBackend(16)
+    other = app.test_client()
+    other.set_cookie(STICKY_COOKIE, 'not-signed')
+    assert 'Forged' not in my_pet_names(other, user_headers)
@@ -0,0 +1,36 @@
+import json
+from models import User
+
+def ndjson(*rows):
+    return '\n'.join(json.dumps(row) for row in rows)
+
+def import_users(client, body, headers=None, query=''):
+    return client.post(f'/api/admin/import/users?format=ndjson{query}', data=body,
+                       content_type='application/x-ndjson', headers=headers or {})
+
+def test_export_requires_admin_token(client, user_headers, admin_headers):
+    url = '/api/admin/export/users?format=ndjson'
+    assert client.get(url).status_code == 401
+    assert client.get(url, headers=user_headers).status_code == 403
+
+    response = client.get(url, headers=admin_headers)
+    assert response.status_code == 200
+    assert 'admin@pettashkent.uz' in response.get_data(as_text=True)
+
+def test_import_requires_admin_token(app, client, user_headers):
+    body = ndjson({'full_name': 'Intruder', 'email': 'intruder@example.com', 'role': 'admin'})
+    assert import_users(client, body).status_code == 401
+    assert import_users(client, body, user_headers).status_code == 403
+    with app.app_context():
+        assert User.query.filter_by(email='intruder@example.com').first() is None
+
+def test_import_ignores_role_unless_asked(app, client, admin_headers):
+    body = ndjson({'full_name': 'Imported', 'email': 'imported@example.com', 'role': 'admin', 'telegram_id': 555})
+    assert import_users(client, body, admin_headers).json['inserted'] == 1
+
+    body = ndjson({'full_name': 'Staff', 'email': 'staff@example.com', 'role': 'admin'})
+    assert import_users(client, body, admin_headers, '&with_roles=1').json['inserted'] == 1
+
+    with app.app_context():
+        assert User.query.filter_by(email='imported@example.com').one().role == 'user'
+        assert User.query.filter_by(email='staff@example.com').one().role == 'admin'
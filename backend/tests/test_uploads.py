@@ -0,0 +1,106 @@
+import io
+import pytest
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def post_image(client, data):
+    return client.post('/api/pets/add', content_type='multipart/form-data', data={
+        'name': 'Rex', 'pet_type': 'dog', 'status': 'free', 'image': (io.BytesIO(data), 'rex.png')
+    })
+
+@pytest.mark.parametrize('data, status', [
+    (b'MZ' + b'\0' * 5000, 415),
+    (PNG_SIGNATURE + b'\0\0\0\rIHDR' + (100000).to_bytes(4, 'big') * 2 + b'\0' * 100, 413),
+])
+def test_rejected_uploads_answer_json(client, data, status):
+    response = post_image(client, data)
+    assert response.status_code == status
+    assert response.is_json
+    assert response.json['error']
+
+def test_oversized_upload_answers_json(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'MAX_IMAGE_SIZE', 64 * 1024)
+    response = post_image(client, PNG_SIGNATURE + b'\0' * (128 * 1024))
+    assert response.status_code == 413
+    assert 'MB' in response.json['error']
+
+def png_bytes(color):
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+def test_identical_uploads_share_one_blob(app, client):
+    from models import db, UploadBlob
+    data = png_bytes('green')
+    images = {post_image(client, data).json['pet']['image'] for _ in range(3)}
+    assert len(images) == 1
+    with app.app_context():
+        assert db.session.get(UploadBlob, images.pop()).refcount == 3
+
+def test_replacing_image_releases_old_one_after_commit(app, client, admin_headers):
+    import os
+    from models import db, UploadBlob
+    pet = post_image(client, png_bytes('blue')).json['pet']
+    headers = admin_headers
+
+    def update(data):
+        response = client.put(f"/api/pets/{pet['id']}", headers=headers, content_type='multipart/form-data',
+                              data={'image': (io.BytesIO(data), 'new.png')})
+        assert response.status_code == 200
+        return response.json['pet']['image']
+
+    # Same content again: the file must survive its own replacement
+    assert update(png_bytes('blue')) == pet['image']
+    with app.app_context():
+        assert db.session.get(UploadBlob, pet['image']).refcount == 1
+
+    new_image = update(png_bytes('yellow'))
+    assert new_image != pet['image']
+    with app.app_context():
+        assert db.session.get(UploadBlob, pet['image']) is None
+        assert db.session.get(UploadBlob, new_image).refcount == 1
+        assert not os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], pet['image']))
+
+def test_released_image_survives_rollback(app, client):
+    import os
+    from models import db, UploadBlob
+    from utils import delete_image
+    image = post_image(client, png_bytes('red')).json['pet']['image']
+    path = os.path.join(app.config['UPLOAD_FOLDER'], image)
+    with app.app_context():
+        delete_image(image)
+        assert os.path.exists(path)
+        db.session.rollback()
+        assert os.path.exists(path)
+        assert db.session.get(UploadBlob, image).refcount == 1
+
+        delete_image(image)
+        db.session.commit()
+        assert not os.path.exists(path)
+
+def test_deleting_pet_unlinks_image_after_commit(app, client, admin_headers):
+    import os
+    pet = post_image(client, png_bytes('purple')).json['pet']
+    path = os.path.join(app.config['UPLOAD_FOLDER'], pet['image'])
+    assert os.path.exists(path)
+    assert client.delete(f"/api/pets/{pet['id']}", headers=admin_headers).status_code == 200
+    assert not os.path.exists(path)
+
+def test_unreferenced_file_is_not_trusted(app, client):
+    import os
+    pet = post_image(client, png_bytes('orange')).json['pet']
+    path = os.path.join(app.config['UPLOAD_FOLDER'], pet['image'])
+    with app.app_context():
+        from models import db
+        from utils import delete_image
+        delete_image(pet['image'])  # Last reference gone, unlink still pending
+        db.session.commit()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as stale:
+        stale.write(b'about to be unlinked')
+
+    # A new upload of the same content must write its own copy
+    assert post_image(client, png_bytes('orange')).json['pet']['image'] == pet['image']
+    with open(path, 'rb') as saved:
+        assert saved.read() == png_bytes('orange')
@@ -1,4 +1,17 @@
-from .auth import admin_required, get_current_user
+from .auth import (admin_required, admin_token_required, get_current_user, principal_cache, create_token, is_admin,
+                   current_user_id)
 from .image_upload import save_image, delete_image, get_image_url, allowed_file
+from .view_counter import view_counter
+from .cache import response_cache
+from .image_pipeline import image_pipeline
+from .compression import compressor
+from .passwords import password_hasher
+from .metrics import metrics
+from .profiling import slow_query_log, request_profiler
+from .notifications import notifier
 
-__all__ = ['admin_required', 'get_current_user', 'save_image', 'delete_image', 'get_image_url', 'allowed_file']
+__all__ = ['admin_required', 'admin_token_required', 'get_current_user', 'principal_cache', 'create_token', 'is_admin',
+           'current_user_id',
+           'save_image', 'delete_image', 'get_image_url', 'allowed_file',
+           'view_counter', 'response_cache', 'image_pipeline', 'compressor', 'password_hasher',
+           'metrics', 'slow_query_log', 'request_profiler', 'notifier']
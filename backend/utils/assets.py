@@ -0,0 +1,186 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+from flask import request, current_app, send_file
+
+try:
+    import brotli
+except ImportError:  # .br variants are only built when brotli is installed
+    brotli = None
+
+COMPRESSIBLE = {'.html', '.css', '.js', '.svg', '.json', '.txt'}
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]  # Preference order
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MEMORY_LIMIT = 512 * 1024  # Assets up to this size are served from memory
+
+REF_RE = re.compile(r'''(?P<attr>\b(?:src|href))=(?P<q>["'])(?P<url>[^"'#?]+)(?P=q)''')
+
+def fingerprint(path, digest):
+    root, ext = posixpath.splitext(path)
+    return f'{root}.{digest}{ext}'
+
+class AssetManifest:
+    """URL path -> file map for the frontend and admin panels.
+
+    Built once (from the build-time manifest file or by hashing at startup)
+    and kept in memory, so serving an asset needs no filesystem lookups.
+    Non-HTML assets are also reachable under a content-hashed name that is
+    cached forever; HTML pages are rewritten to reference those names.
+    """
+
+    def __init__(self, mounts, manifest_path=None):
+        self.mounts = mounts  # {'/': dir, '/admin/': dir}
+        self.manifest_path = manifest_path
+        self.entries = {}
+        self.fingerprinted = {}
+
+    def _files(self):
+        for prefix, root in self.mounts.items():
+            for dirpath, dirnames, filenames in os.walk(root):
+                for name in filenames:
+                    if name.endswith(('.gz', '.br')):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    rel = os.path.relpath(path, root).replace(os.sep, '/')
+                    yield prefix + rel, path
+
+    def scan(self):
+        """Hash every file and note which precompressed variants exist"""
+        entries = {}
+        for url, path in self._files():
+            with open(path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()[:12]
+            entries[url] = {
+                'hash': digest,
+                'encodings': [enc for enc, suffix in ENCODINGS if os.path.exists(path + suffix)]
+            }
+        return entries
+
+    def build(self):
+        """Write .gz/.br variants and the manifest file (run at deploy time)"""
+        for url, path in self._files():
+            # HTML is rewritten and compressed in memory at load time
+            if os.path.splitext(path)[1] not in COMPRESSIBLE or url.endswith('.html'):
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            with open(path + '.gz', 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                with open(path + '.br', 'wb') as f:
+                    f.write(brotli.compress(data))
+
+        entries = self.scan()
+        if self.manifest_path:
+            with open(self.manifest_path, 'w') as f:
+                json.dump(entries, f, indent=2, sort_keys=True)
+        self._index(entries)
+        return entries
+
+    def load(self):
+        """Use the build-time manifest if present, else hash files now"""
+        if self.manifest_path and os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                entries = json.load(f)
+        else:
+            entries = self.scan()
+        self._index(entries)
+        return self
+
+    def _path(self, url):
+        for prefix in sorted(self.mounts, key=len, reverse=True):
+            if url.startswith(prefix):
+                return os.path.join(self.mounts[prefix], *url[len(prefix):].split('/'))
+
+    def _index(self, entries):
+        self.entries = entries = {
+            url: entry for url, entry in entries.items() if os.path.exists(self._path(url))
+        }
+        self.fingerprinted = {
+            fingerprint(url, entry['hash']): url
+            for url, entry in entries.items() if not url.endswith('.html')
+        }
+        for url, entry in entries.items():
+            entry['path'] = self._path(url)
+            entry['mimetype'] = mimetypes.guess_type(url)[0] or 'application/octet-stream'
+            entry['bodies'] = {}
+            if url.endswith('.html'):
+                body = self._rewrite_html(url, entry['path'])
+                entry['bodies'] = {None: body, 'gzip': gzip.compress(body, mtime=0)}
+            elif os.path.getsize(entry['path']) <= MEMORY_LIMIT:
+                entry['bodies'][None] = self._read(entry['path'])
+                for enc, suffix in ENCODINGS:
+                    if enc in entry['encodings']:
+                        entry['bodies'][enc] = self._read(entry['path'] + suffix)
+
+    @staticmethod
+    def _read(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def _rewrite_html(self, url, path):
+        """Point relative asset references at their fingerprinted names"""
+        html = self._read(path).decode('utf-8')
+        base = posixpath.dirname(url)
+
+        def replace(match):
+            ref = match.group('url')
+            if ref.startswith(('/', 'http:', 'https:', 'data:', 'mailto:')) or ':' in ref:
+                return match.group(0)
+            target = posixpath.normpath(posixpath.join(base, ref))
+            entry = self.entries.get(target)
+            if entry is None or target.endswith('.html'):
+                return match.group(0)
+            new_ref = fingerprint(ref, entry['hash'])
+            return f"{match.group('attr')}={match.group('q')}{new_ref}{match.group('q')}"
+
+        return REF_RE.sub(replace, html).encode('utf-8')
+
+    def lookup(self, url):
+        """(entry, immutable) for a plain or fingerprinted URL, or (None, False)"""
+        if url in self.entries:
+            return self.entries[url], False
+        original = self.fingerprinted.get(url)
+        if original is not None:
+            return self.entries[original], True
+        return None, False
+
+def serve_asset(manifest, url):
+    """Response for an asset URL, or None if the manifest doesn't know it"""
+    entry, immutable = manifest.lookup(url)
+    if entry is None:
+        return None
+
+    accepted = request.accept_encodings
+    encoding = None
+    for enc, _ in ENCODINGS:
+        if accepted[enc] and (enc in entry['bodies'] or enc in entry['encodings']):
+            encoding = enc
+            break
+
+    if None in entry['bodies']:
+        body = entry['bodies'].get(encoding, entry['bodies'][None])
+        if encoding not in entry['bodies']:
+            encoding = None
+        response = current_app.response_class(body, mimetype=entry['mimetype'])
+    else:
+        path = entry['path'] + dict(ENCODINGS)[encoding] if encoding else entry['path']
+        response = send_file(path, mimetype=entry['mimetype'], etag=False, conditional=False)
+
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.set_etag(f"{entry['hash']}-{encoding}" if encoding else entry['hash'])
+
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+
+    return response.make_conditional(request)
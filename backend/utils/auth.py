@@ -1,7 +1,65 @@
+from collections import namedtuple
 from functools import wraps
 from flask import jsonify, request
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from models import User
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, create_access_token
+from models import db, User
+from .cache import MemoryBackend
+
+# What authorization checks need to know about a user
+Principal = namedtuple('Principal', ['id', 'role', 'is_banned'])
+
+class PrincipalCache:
+    """Per-process TTL/LRU cache of user principals.
+
+    Token claims can't be trusted for role/ban checks (a token outlives a
+    ban by days), so checks read the principal from here and only hit the
+    database once per user per ttl. Admin actions invalidate the entry
+    immediately in their own worker; other workers catch up within ttl.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 30
+        self.backend = MemoryBackend(4096)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('PRINCIPAL_CACHE_TTL', 30)
+        self.backend = MemoryBackend(app.config.get('PRINCIPAL_CACHE_SIZE', 4096))
+        app.extensions['principal_cache'] = self
+
+    def get(self, user_id):
+        """Principal for user_id, or None if the user doesn't exist"""
+        if user_id is None:
+            return None
+        principal = self.backend.get(user_id) if self.ttl > 0 else None
+        if principal is None:
+            row = db.session.query(User.id, User.role, User.is_banned)\
+                .filter(User.id == user_id).first()
+            if row is None:
+                return None
+            principal = Principal(row.id, row.role, bool(row.is_banned))
+            if self.ttl > 0:
+                self.backend.set(user_id, principal, self.ttl)
+        return principal
+
+    def invalidate(self, user_id):
+        self.backend.delete(user_id)
+
+principal_cache = PrincipalCache()
+
+def create_token(user):
+    """Access token carrying the user's role and ban state as claims for clients"""
+    # PyJWT only accepts a string subject
+    return create_access_token(
+        identity=str(user.id),
+        additional_claims={'role': user.role, 'banned': bool(user.is_banned)}
+    )
+
+def current_user_id():
+    """Integer id from the verified token's identity, or None without one"""
+    identity = get_jwt_identity()
+    return int(identity) if identity is not None else None
 
 def admin_required():
     """Decorator to require admin role - optional for demo mode"""
@@ -13,13 +71,12 @@ def admin_required():
             if auth_header.startswith('Bearer '):
                 try:
                     verify_jwt_in_request()
-                    user_id = get_jwt_identity()
-                    user = User.query.get(user_id)
+                    principal = principal_cache.get(current_user_id())
                     
-                    if not user or user.role != 'admin':
+                    if not principal or principal.role != 'admin':
                         return jsonify({'error': 'Admin access required'}), 403
                     
-                    if user.is_banned:
+                    if principal.is_banned:
                         return jsonify({'error': 'Account is banned'}), 403
                 except Exception as e:
                     # Token invalid - check if demo mode
@@ -29,11 +86,34 @@ def admin_required():
         return decorator
     return wrapper
 
+def admin_token_required():
+    """Decorator for bulk and data-transfer admin actions.
+
+    Unlike admin_required there is no demo mode: a request needs a verified
+    token whose principal is an admin in good standing.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            verify_jwt_in_request()
+            principal = principal_cache.get(current_user_id())
+            if not principal or principal.role != 'admin':
+                return jsonify({'error': 'Admin access required'}), 403
+            if principal.is_banned:
+                return jsonify({'error': 'Account is banned'}), 403
+            return fn(*args, **kwargs)
+        return decorator
+    return wrapper
+
+def is_admin(user_id):
+    """Role check for the current identity without loading the User row"""
+    principal = principal_cache.get(user_id)
+    return principal is not None and principal.role == 'admin'
+
 def get_current_user():
     """Get current user from JWT token"""
     try:
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        return User.query.get(user_id)
+        return db.session.get(User, current_user_id())
     except:
         return None
@@ -0,0 +1,58 @@
+from models import db
+
+# Upper bound on rows touched by one bulk request
+MAX_BULK_IDS = 1000
+
+class BulkError(ValueError):
+    """Raised when a bulk request body is malformed"""
+
+def parse_ids(data):
+    """Validated, de-duplicated list of integer ids from {"ids": [...]}"""
+    ids = (data or {}).get('ids')
+    if not isinstance(ids, list) or not ids:
+        raise BulkError('ids must be a non-empty list')
+    if len(ids) > MAX_BULK_IDS:
+        raise BulkError(f'At most {MAX_BULK_IDS} ids per request')
+    try:
+        return list(dict.fromkeys(int(i) for i in ids))
+    except (TypeError, ValueError):
+        raise BulkError('ids must be integers')
+
+def bulk_update(model, ids, values, skip=None, columns=()):
+    """Apply values to the rows in ids with a single UPDATE.
+
+    skip(row) may return a reason to leave a row alone; columns names extra
+    columns it needs besides id and those in values. Rows that already
+    have the target values are reported 'unchanged' and not rewritten.
+    Returns ({id: result}, updated_ids) where result is 'updated',
+    'unchanged', 'not_found' or the skip reason.
+    """
+    selected = [getattr(model, name) for name in dict.fromkeys([*values, *columns])]
+    rows = {row.id: row for row in db.session.query(model.id, *selected).filter(model.id.in_(ids))}
+
+    results = {}
+    updated = []
+    for item_id in ids:
+        row = rows.get(item_id)
+        reason = skip(row) if skip is not None and row is not None else None
+        if row is None:
+            results[item_id] = 'not_found'
+        elif reason:
+            results[item_id] = reason
+        elif all(getattr(row, name) == value for name, value in values.items()):
+            results[item_id] = 'unchanged'
+        else:
+            results[item_id] = 'updated'
+            updated.append(item_id)
+
+    if updated:
+        model.query.filter(model.id.in_(updated))\
+            .update(values, synchronize_session=False)
+    db.session.commit()
+    return results, updated
+
+def bulk_response(results, updated):
+    return {
+        'updated': len(updated),
+        'results': [{'id': item_id, 'result': result} for item_id, result in results.items()]
+    }
@@ -0,0 +1,144 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+from flask import request, current_app, make_response
+
+class MemoryBackend:
+    """In-process LRU store with per-entry TTL.
+
+    Tag versions are per process too, so an invalidate() reaches only the
+    worker that ran it; the others see the change after their entries expire.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Tag versions live outside the LRU so eviction can never reset them
+        self._versions = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_versions(self, tags):
+        return [self._versions.get(tag, 0) for tag in tags]
+
+    def bump_version(self, tag):
+        with self._lock:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+class RedisBackend:
+    """Shared store so every worker sees the same entries and invalidations"""
+
+    def __init__(self, url, prefix='pt:cache:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_BACKEND=redis requires the redis package')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, timeout):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=int(timeout))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def get_versions(self, tags):
+        values = self.client.mget([f'{self.prefix}tag:{tag}' for tag in tags])
+        return [int(v) if v is not None else 0 for v in values]
+
+    def bump_version(self, tag):
+        self.client.incr(f'{self.prefix}tag:{tag}')
+
+class ResponseCache:
+    """Caches GET responses keyed on path + sorted query args.
+
+    Entries are tagged by entity ('pets', 'clinics', ...). Each tag has a
+    version that is part of the key, so invalidate('pets') makes every
+    pets-tagged entry unreachable at once without scanning the store.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        kind = app.config.get('CACHE_BACKEND', 'memory')
+        if kind == 'redis':
+            self.backend = RedisBackend(app.config['CACHE_REDIS_URL'])
+        elif kind == 'memory':
+            self.backend = MemoryBackend(app.config.get('CACHE_MAX_ENTRIES', 1024))
+        else:
+            self.backend = None
+        app.extensions['response_cache'] = self
+
+    def make_key(self, tags):
+        # Empty values stay: ?cursor= is a different response than no cursor
+        args = sorted(request.args.items(multi=True))
+        versions = self.backend.get_versions(tags)
+        tag_part = ','.join(f'{tag}={version}' for tag, version in zip(tags, versions))
+        return f'{request.path}?{urlencode(args)}|{tag_part}'
+
+    def cached(self, *tags, timeout=None):
+        """Decorator caching successful GET responses under the given tags"""
+        def wrapper(fn):
+            @wraps(fn)
+            def decorator(*args, **kwargs):
+                if self.backend is None or request.method != 'GET':
+                    return fn(*args, **kwargs)
+
+                key = self.make_key(tags)
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self.hits += 1
+                    status, body, mimetype = entry
+                    return current_app.response_class(body, status=status, mimetype=mimetype)
+
+                self.misses += 1
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code == 200 and not response.direct_passthrough:
+                    ttl = timeout or current_app.config.get('CACHE_DEFAULT_TIMEOUT', 60)
+                    self.backend.set(key, (response.status_code, response.get_data(), response.mimetype), ttl)
+                return response
+            return decorator
+        return wrapper
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of the given tags"""
+        if self.backend is None:
+            return
+        for tag in tags:
+            self.backend.bump_version(tag)
+
+response_cache = ResponseCache()
@@ -0,0 +1,63 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # gzip only without brotli
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/csv', 'text/plain'}
+
+# Suffixes added to the ETag of compressed bodies; see utils.etag.not_modified
+ETAG_SUFFIXES = {'br': '-br', 'gzip': '-gzip'}
+
+class Compressor:
+    """Compresses API responses above a size threshold with brotli or gzip"""
+
+    def __init__(self, app=None):
+        self.min_size = 1024
+        self.level = 6
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+        self.level = app.config.get('COMPRESS_LEVEL', 6)
+        app.after_request(self.compress)
+        app.extensions['compressor'] = self
+
+    def choose_encoding(self):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def compress(self, response):
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self.choose_encoding()
+        data = response.get_data()
+        if encoding is None or len(data) < self.min_size:
+            return response
+
+        if encoding == 'br':
+            # Low quality keeps per-request CPU close to gzip
+            data = brotli.compress(data, quality=4)
+        else:
+            data = gzip.compress(data, compresslevel=self.level)
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+
+        # Different bytes need a different validator
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(etag + ETAG_SUFFIXES[encoding], weak)
+        return response
+
+compressor = Compressor()
@@ -0,0 +1,58 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+def database_url(url):
+    """Normalize DATABASE_URL; some hosts still hand out the postgres:// scheme"""
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured backend"""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite':
+        # Pragmas are applied per connection in configure_sqlite()
+        return {}
+
+    options = {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+    if url.get_backend_name() == 'postgresql' and config['DB_STATEMENT_TIMEOUT_MS']:
+        options['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"}
+    return options
+
+def replica_binds(config):
+    """SQLALCHEMY_BINDS entries for DATABASE_REPLICA_URLS (comma-separated)"""
+    urls = [u.strip() for u in (config.get('DATABASE_REPLICA_URLS') or '').split(',') if u.strip()]
+    binds = {}
+    for i, url in enumerate(urls):
+        url = database_url(url)
+        binds[f'replica{i}'] = {'url': url, **engine_options({**config, 'SQLALCHEMY_DATABASE_URI': url})}
+    return binds
+
+def configure_sqlite(app, engine):
+    """WAL, synchronous and busy_timeout pragmas on every new SQLite connection.
+
+    WAL lets readers proceed while a worker writes, and busy_timeout makes
+    a writer wait for the lock instead of failing with 'database is locked'.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    in_memory = engine.url.database in (None, '', ':memory:')
+    journal_mode = app.config['SQLITE_JOURNAL_MODE']
+    synchronous = app.config['SQLITE_SYNCHRONOUS']
+    busy_timeout = int(app.config['SQLITE_BUSY_TIMEOUT_MS'])
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if journal_mode and not in_memory:
+            cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+        if synchronous:
+            cursor.execute(f'PRAGMA synchronous={synchronous}')
+        cursor.execute(f'PRAGMA busy_timeout={busy_timeout}')
+        cursor.close()
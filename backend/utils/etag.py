@@ -0,0 +1,56 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+from flask import request, make_response
+from flask_jwt_extended import get_jwt_identity
+from models import DataVersion
+from .compression import ETAG_SUFFIXES
+
+def compute_etag(tables, per_user=False, daily=False):
+    """Strong ETag from the request (path + sorted args) and the data versions it reads"""
+    # Empty values stay: ?cursor= selects a different response shape than no cursor
+    args = sorted(request.args.items(multi=True))
+    parts = [request.path, repr(args), repr(DataVersion.get(list(tables)))]
+    if per_user:
+        parts.append(str(get_jwt_identity()))
+    if daily:
+        # Stats windows such as "today" move at midnight even without writes
+        parts.append(datetime.utcnow().date().isoformat())
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+def not_modified(etag):
+    """304 response if the client's If-None-Match already has etag, else None"""
+    # Compressed responses carry the ETag with an encoding suffix
+    for candidate in [etag] + [etag + suffix for suffix in ETAG_SUFFIXES.values()]:
+        if request.if_none_match.contains(candidate):
+            response = make_response('', 304)
+            response.set_etag(candidate)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+    return None
+
+def with_etag(response, etag):
+    response = make_response(response)
+    if response.status_code == 200:
+        response.set_etag(etag)
+        # Let browsers keep the body but revalidate on every use
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def conditional(*tables, per_user=False, daily=False):
+    """Decorator answering If-None-Match with 304 before the view runs.
+
+    tables: every table the response is built from.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            if request.method != 'GET':
+                return fn(*args, **kwargs)
+            etag = compute_etag(tables, per_user, daily)
+            cached = not_modified(etag)
+            if cached is not None:
+                return cached
+            return with_etag(fn(*args, **kwargs), etag)
+        return decorator
+    return wrapper
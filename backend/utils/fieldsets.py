@@ -0,0 +1,39 @@
+from flask import request
+from sqlalchemy.orm import load_only, joinedload, lazyload
+
+class InvalidFields(ValueError):
+    """Raised when ?fields= names something the model does not serialize"""
+
+def requested_fields(model):
+    """Fields listed in ?fields=a,b,c, or None for every field"""
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in model.FIELDS]
+    if unknown:
+        raise InvalidFields(', '.join(unknown))
+    return fields
+
+def load_fields(query, model, fields, always=()):
+    """Only SELECT the columns (and joins) the requested fields read.
+
+    always: extra columns the caller needs, e.g. for a pagination cursor.
+    """
+    if fields is None:
+        return query
+
+    relationships = getattr(model, 'FIELD_RELATIONSHIPS', {})
+    names = set(always)
+    for field in fields:
+        names.update(model.FIELD_COLUMNS.get(field, (field,)))
+    options = [load_only(*[getattr(model, name) for name in sorted(names)])]
+
+    for field, (name, column) in relationships.items():
+        relationship = getattr(model, name)
+        if field in fields:
+            target = relationship.property.mapper.class_
+            options.append(joinedload(relationship).load_only(getattr(target, column)))
+        else:
+            options.append(lazyload(relationship))
+    return query.options(*options)
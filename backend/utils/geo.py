@@ -0,0 +1,65 @@
+from math import radians, sin, cos, asin, sqrt
+from sqlalchemy import table, column
+from models import Clinic
+from .migrations import table_exists
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+# Smallest radius the k-nearest search starts from, so doubling always reaches max_radius_km
+MIN_SEARCH_RADIUS_KM = 0.5
+
+# SQLite R*Tree mirror of clinics.lat/lng, kept in sync by triggers (see migrations)
+clinics_rtree = table(
+    'clinics_rtree',
+    column('id'), column('min_lat'), column('max_lat'), column('min_lng'), column('max_lng')
+)
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in km"""
+    dlat = radians(lat2 - lat1)
+    dlng = radians(lng2 - lng1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+def clinics_in_box(lat, lng, radius_km):
+    """Active clinics inside the bounding box of a circle, using the spatial index"""
+    lat_range = radius_km / KM_PER_DEGREE
+    lng_range = radius_km / (KM_PER_DEGREE * max(cos(radians(lat)), 0.01))
+
+    query = Clinic.query.filter(Clinic.is_active == True)
+    if table_exists('clinics_rtree'):
+        return query.join(clinics_rtree, clinics_rtree.c.id == Clinic.id).filter(
+            clinics_rtree.c.max_lat >= lat - lat_range,
+            clinics_rtree.c.min_lat <= lat + lat_range,
+            clinics_rtree.c.max_lng >= lng - lng_range,
+            clinics_rtree.c.min_lng <= lng + lng_range
+        ).all()
+
+    return query.filter(
+        Clinic.lat.between(lat - lat_range, lat + lat_range),
+        Clinic.lng.between(lng - lng_range, lng + lng_range)
+    ).all()
+
+def find_nearby_clinics(lat, lng, radius_km=5, limit=None, max_radius_km=50):
+    """Return [(clinic, distance_km)] sorted by distance.
+
+    Without limit: every clinic within radius_km.
+    With limit: the k nearest clinics, widening the search from radius_km
+    up to max_radius_km until enough are found.
+    """
+    if limit is not None and not radius_km >= MIN_SEARCH_RADIUS_KM:
+        radius_km = MIN_SEARCH_RADIUS_KM  # Also catches NaN, which would never widen
+    while True:
+        found = []
+        for clinic in clinics_in_box(lat, lng, radius_km):
+            distance = haversine_km(lat, lng, clinic.lat, clinic.lng)
+            # The box corners lie outside the circle
+            if distance <= radius_km:
+                found.append((clinic, distance))
+
+        if limit is None or len(found) >= limit or radius_km >= max_radius_km:
+            break
+        radius_km = min(radius_km * 2, max_radius_km)
+
+    found.sort(key=lambda item: item[1])
+    return found[:limit] if limit is not None else found
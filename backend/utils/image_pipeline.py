@@ -0,0 +1,103 @@
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; originals are served as-is without it
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels for each generated size
+IMAGE_SIZES = {'thumb': 320, 'card': 800, 'full': 1600}
+FORMAT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+VARIANT_RE = re.compile(r'^(?P<original>.+)\.(?P<size>thumb|card|full)\.(?:webp|jpg)$')
+
+def variant_filename(filename, size, fmt='webp'):
+    """Name of a generated variant, stored next to the original"""
+    return f'{filename}.{size}.{FORMAT_EXTENSIONS[fmt]}'
+
+def original_filename(filename):
+    """Original upload a variant filename was generated from, or None"""
+    match = VARIANT_RE.match(filename)
+    return match.group('original') if match else None
+
+class ImagePipeline:
+    """Generates resized, metadata-free variants of uploads in a background worker pool"""
+
+    def __init__(self, app=None):
+        self.upload_folder = None
+        self.format = 'webp'
+        self.workers = 2
+        self._executor = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.upload_folder = app.config['UPLOAD_FOLDER']
+        self.format = app.config.get('IMAGE_VARIANT_FORMAT', 'webp')
+        self.quality = app.config.get('IMAGE_VARIANT_QUALITY', 80)
+        self.workers = app.config.get('IMAGE_WORKERS', 2)
+        app.extensions['image_pipeline'] = self
+
+    @property
+    def enabled(self):
+        return Image is not None and self.upload_folder is not None and self.workers > 0
+
+    def variants(self, filename):
+        """URLs of every size of an uploaded image"""
+        if not filename or not self.enabled:
+            return None
+        return {
+            size: f"/static/uploads/{variant_filename(filename, size, self.format)}"
+            for size in IMAGE_SIZES
+        }
+
+    def submit(self, filename):
+        """Queue variant generation; returns a Future or None when disabled"""
+        if not filename or not self.enabled:
+            return None
+        # Created lazily so each forked gunicorn worker has its own pool
+        if self._executor is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image')
+        return self._executor.submit(self.process, filename)
+
+    def process(self, filename):
+        """Decode, strip metadata and write every size of filename"""
+        path = os.path.join(self.upload_folder, filename)
+        try:
+            with Image.open(path) as img:
+                img.seek(0)  # First frame of animated images
+                img = ImageOps.exif_transpose(img)
+                if self.format == 'jpeg' or img.mode not in ('RGB', 'RGBA'):
+                    img = img.convert('RGB' if self.format == 'jpeg' else 'RGBA')
+
+                for size, edge in IMAGE_SIZES.items():
+                    target = os.path.join(self.upload_folder, variant_filename(filename, size, self.format))
+                    if os.path.exists(target):
+                        continue
+                    resized = img.copy()
+                    resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+                    # Write then rename so half-written files are never served.
+                    # No exif/icc arguments are passed, so metadata is dropped.
+                    tmp = f'{target}.tmp'
+                    resized.save(tmp, format=self.format.upper(), quality=self.quality)
+                    os.replace(tmp, target)
+        except Exception:
+            logger.exception('Failed to generate image variants', extra={'upload': filename})
+            return False
+        return True
+
+    def delete_variants(self, filename):
+        for size in IMAGE_SIZES:
+            for fmt in FORMAT_EXTENSIONS:
+                path = os.path.join(self.upload_folder, variant_filename(filename, size, fmt))
+                if os.path.exists(path):
+                    os.remove(path)
+
+image_pipeline = ImagePipeline()
@@ -1,62 +1,175 @@
 import os
-import uuid
-from werkzeug.utils import secure_filename
+import time
+import logging
 from flask import current_app
+from sqlalchemy import func, event, select
+from sqlalchemy.orm import Session
+from models import db, Pet, Clinic, UploadBlob
+from .image_pipeline import image_pipeline, original_filename
+from .upload_stream import ImageUploadStream
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+CHUNK_SIZE = 64 * 1024
 
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def blob_path(digest, ext):
+    """Sharded relative path so no directory holds more than a few thousand files"""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
 def save_image(file):
-    """Save uploaded image and return filename"""
-    print(f"[save_image] Called with file: {file}")
-    
-    if not file:
-        print("[save_image] No file provided")
-        return None
-    
-    print(f"[save_image] Filename: {file.filename}")
-    
-    if not file.filename:
-        print("[save_image] Empty filename")
+    """Save uploaded image into the content-addressed store and return its path"""
+    if not file or not file.filename:
         return None
-        
-    if not allowed_file(file.filename):
-        print(f"[save_image] File not allowed: {file.filename}")
+
+    stream = file.stream
+    if isinstance(stream, ImageUploadStream):
+        # Already validated, hashed and on disk while the body was parsed
+        if stream.kind is None:
+            logger.info('Rejected upload that is not an image', extra={'upload_name': file.filename})
+            return None
+        ext = stream.extension
+    elif allowed_file(file.filename):
+        ext = file.filename.rsplit('.', 1)[1].lower()
+        stream = spool_to_disk(file.stream)
+    else:
+        logger.info('Rejected upload with disallowed extension', extra={'upload_name': file.filename})
         return None
-    
-    # Generate unique filename
-    ext = file.filename.rsplit('.', 1)[1].lower()
-    filename = f"{uuid.uuid4().hex}.{ext}"
-    
-    # Ensure upload folder exists
+
     upload_folder = current_app.config['UPLOAD_FOLDER']
-    print(f"[save_image] Upload folder: {upload_folder}")
-    os.makedirs(upload_folder, exist_ok=True)
-    
-    # Save file
+    filename = blob_path(stream.sha256.hexdigest(), ext)
     filepath = os.path.join(upload_folder, filename)
-    print(f"[save_image] Saving to: {filepath}")
-    
+    size = stream.size
+
+    # Reference is committed together with the pet/clinic row. An existing
+    # file is only trusted while another reference holds it; as the sole
+    # reference it may be one a concurrent delete is about to unlink.
+    connection = db.session.connection()
+    is_new = UploadBlob.acquire(connection, filename, size) == 1 or not os.path.exists(filepath)
     try:
-        file.save(filepath)
-        print(f"[save_image] SUCCESS! Saved as: {filename}")
-        return filename
-    except Exception as e:
-        print(f"[save_image] ERROR saving file: {e}")
+        if is_new:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            stream.claim(filepath)
+        else:
+            stream.discard()
+    except Exception:
+        logger.exception('Saving upload failed', extra={'upload': filename})
+        stream.discard()
+        UploadBlob.release(connection, filename)
         return None
 
-def delete_image(filename):
-    """Delete image file"""
-    if filename:
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        if os.path.exists(filepath):
-            os.remove(filepath)
-            return True
+    metrics.inc('upload_bytes_total', size)
+    metrics.inc('uploads_total', deduplicated=str(not is_new).lower())
+    logger.debug('Saved upload', extra={'upload': filename, 'size': size, 'new': is_new})
+    if is_new:
+        # Resized variants are generated off the request thread
+        image_pipeline.submit(filename)
+    return filename
+
+def spool_to_disk(source):
+    """Copy a non-streamed file object into the upload temp folder in chunks"""
+    config = current_app.config
+    stream = ImageUploadStream(
+        os.path.join(config['UPLOAD_FOLDER'], '.tmp'),
+        max_size=config['MAX_CONTENT_LENGTH'],
+        max_pixels=config.get('MAX_IMAGE_PIXELS', 40_000_000),
+        validate=False  # Extension was already checked
+    )
+    while True:
+        chunk = source.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        stream.write(chunk)
+    return stream
+
+def remove_files(filename):
+    """Remove an upload and its generated variants from disk"""
+    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+    image_pipeline.delete_variants(filename)
+    if os.path.exists(filepath):
+        os.remove(filepath)
+        return True
     return False
 
+def remove_after_commit(filename):
+    """Unlink an upload once the current transaction commits, unless it is referenced again by then"""
+    db.session.info.setdefault('remove_uploads', set()).add(filename)
+
+@event.listens_for(Session, 'after_commit')
+def _remove_released_uploads(session):
+    filenames = session.info.pop('remove_uploads', None)
+    if not filenames:
+        return
+    # The session cannot run SQL here; check on a connection of its own
+    table = UploadBlob.__table__
+    with db.engine.connect() as connection:
+        kept = set(connection.execute(select(table.c.filename).where(table.c.filename.in_(filenames))).scalars())
+    for filename in filenames - kept:
+        remove_files(filename)
+
+@event.listens_for(Session, 'after_rollback')
+def _keep_released_uploads(session):
+    session.info.pop('remove_uploads', None)
+
+def delete_image(filename):
+    """Drop one reference to an image; the file goes after commit when nothing uses it"""
+    if not filename:
+        return False
+
+    remaining = UploadBlob.release(db.session.connection(), filename)
+    if remaining is not None and remaining > 0:
+        return False
+    # No row means a legacy uuid-named upload, owned by a single row
+    remove_after_commit(filename)
+    return True
+
+def collect_garbage(grace_seconds=3600):
+    """Reconcile refcounts with pets/clinics and delete unreferenced uploads.
+
+    Catches orphans from bulk deletes, failed requests and crashes. Files
+    younger than grace_seconds are kept so in-flight uploads survive.
+    """
+    references = {}
+    for model in (Pet, Clinic):
+        rows = db.session.query(model.image, func.count(model.id))\
+            .filter(model.image.isnot(None)).group_by(model.image)
+        for image, count in rows:
+            references[image] = references.get(image, 0) + count
+
+    removed = 0
+    fixed = 0
+    for blob in UploadBlob.query.all():
+        count = references.get(blob.filename, 0)
+        if count == 0:
+            db.session.delete(blob)
+            remove_after_commit(blob.filename)
+            removed += 1
+        elif blob.refcount != count:
+            blob.refcount = count
+            fixed += 1
+    db.session.commit()
+
+    # Files on disk that no blob row or listing knows about
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    known = set(references) | {b.filename for b in UploadBlob.query.with_entities(UploadBlob.filename)}
+    cutoff = time.time() - grace_seconds
+    for root, dirs, files in os.walk(upload_folder):
+        for name in files:
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, upload_folder).replace(os.sep, '/')
+            if filename in known or original_filename(filename) in known:
+                continue
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+
+    return {'removed': removed, 'refcounts_fixed': fixed}
+
 def get_image_url(filename):
     """Get full URL for image"""
     if filename:
@@ -0,0 +1,161 @@
+import hmac
+import threading
+import time
+from collections import defaultdict
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{str(v)}"' for k, v in labels) + '}'
+
+class Metrics:
+    """In-process request, SQL, upload and cache metrics in Prometheus text format.
+
+    Each gunicorn worker keeps its own numbers; scrape every worker or run
+    a single worker per metrics target.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.collected = {}  # name -> (callable returning the current value, type)
+        self.help = {}
+        self.token = None
+        self.allowed_ips = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.token = app.config.get('METRICS_TOKEN')
+        self.allowed_ips = {ip.strip() for ip in (app.config.get('METRICS_ALLOWED_IPS') or '').split(',') if ip.strip()}
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._end_request)
+        app.extensions['metrics'] = self
+
+    def instrument_engine(self, engine):
+        """Count statements and their time against the current request"""
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] += value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def collect(self, name, fn, kind='gauge', help_text=None):
+        """Register a value read at scrape time, e.g. another component's hit counter"""
+        self.collected[name] = (fn, kind)
+        if help_text:
+            self.help[name] = help_text
+
+    def scrape_allowed(self):
+        """Whether the current request may read the metrics.
+
+        Either it carries Authorization: Bearer <METRICS_TOKEN>, or it comes
+        straight (not through a proxy) from one of METRICS_ALLOWED_IPS.
+        """
+        auth = request.headers.get('Authorization', '')
+        if self.token and auth.startswith('Bearer ') and hmac.compare_digest(auth[7:].encode(), self.token.encode()):
+            return True
+        return request.remote_addr in self.allowed_ips and 'X-Forwarded-For' not in request.headers
+
+    def _start_request(self):
+        g.metrics_start = time.perf_counter()
+        g.sql_statements = 0
+        g.sql_seconds = 0.0
+
+    def _end_request(self, response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        labels = {'endpoint': endpoint, 'method': request.method}
+        self.observe('http_request_duration_seconds', time.perf_counter() - start, **labels)
+        self.inc('http_requests_total', status=response.status_code, **labels)
+        self.observe('http_request_sql_statements', g.sql_statements, STATEMENT_BUCKETS, endpoint=endpoint)
+        self.inc('sql_statements_total', g.sql_statements, endpoint=endpoint)
+        self.inc('sql_seconds_total', g.sql_seconds, endpoint=endpoint)
+        return response
+
+    def render(self):
+        """Prometheus text exposition of everything recorded so far"""
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            histograms = [(key, list(h.counts), h.sum, h.count, h.buckets) for key, h in histograms]
+
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f'# TYPE {name} counter')
+                typed.add(name)
+            lines.append(f'{name}{_labels(labels)} {value:g}')
+
+        for (name, labels), counts, total, count, buckets in histograms:
+            if name not in typed:
+                lines.append(f'# TYPE {name} histogram')
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_labels(labels + (("le", f"{bound:g}"),))} {cumulative}')
+            lines.append(f'{name}_bucket{_labels(labels + (("le", "+Inf"),))} {count}')
+            lines.append(f'{name}_sum{_labels(labels)} {total:g}')
+            lines.append(f'{name}_count{_labels(labels)} {count}')
+
+        for name, (fn, kind) in sorted(self.collected.items()):
+            if name in self.help:
+                lines.append(f'# HELP {name} {self.help[name]}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name} {fn():g}')
+
+        return '\n'.join(lines) + '\n'
+
+# The start time lives on the statement's execution context, which is
+# dropped with the statement, so one that fails leaves nothing behind
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.metrics_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, 'metrics_start', None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    if has_request_context() and 'sql_statements' in g:
+        g.sql_statements += 1
+        g.sql_seconds += elapsed
+
+metrics = Metrics()
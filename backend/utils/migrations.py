@@ -0,0 +1,172 @@
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from models import db, DailyStat, DataVersion
+from models.data_version import TRACKED_TABLES, TRACKED_VERSIONS
+
+# Ordered list of (version, description, fn); fn receives an open connection
+MIGRATIONS = []
+
+def migration(version, description):
+    """Register a schema migration"""
+    def wrapper(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return wrapper
+
+def create_indexes(conn, *names):
+    """Create named indexes declared on the models if they are missing"""
+    wanted = set(names)
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in wanted:
+                index.create(conn, checkfirst=True)
+                wanted.discard(index.name)
+    if wanted:
+        raise RuntimeError(f"Unknown indexes: {', '.join(sorted(wanted))}")
+
+_existing_tables = {}
+
+def table_exists(name):
+    """Whether an optional SQLite virtual table (FTS, R*Tree) was created; cached per database"""
+    engine = db.engine
+    key = (str(engine.url), name)
+    if key not in _existing_tables:
+        if engine.dialect.name != 'sqlite':
+            _existing_tables[key] = False
+        else:
+            with engine.connect() as conn:
+                _existing_tables[key] = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': name}
+                ).first() is not None
+    return _existing_tables[key]
+
+def run_migrations():
+    """Apply pending migrations; safe to call on every startup"""
+    with db.engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_migrations ('
+            'version INTEGER PRIMARY KEY, description VARCHAR(200), applied_at DATETIME)'
+        ))
+        applied = {row[0] for row in conn.execute(text('SELECT version FROM schema_migrations'))}
+
+    for version, description, fn in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            with db.engine.begin() as conn:
+                fn(conn)
+                conn.execute(
+                    text('INSERT INTO schema_migrations (version, description, applied_at) '
+                         'VALUES (:version, :description, :applied_at)'),
+                    {'version': version, 'description': description, 'applied_at': datetime.utcnow()}
+                )
+        except IntegrityError:
+            # Another worker applied it concurrently
+            pass
+    
+    _existing_tables.clear()
+
+@migration(1, 'Indexes for pet catalog, donation and user queries')
+def add_catalog_indexes(conn):
+    create_indexes(
+        conn,
+        'ix_pets_catalog', 'ix_pets_catalog_type', 'ix_pets_catalog_status',
+        'ix_pets_user_created', 'ix_pets_created_at',
+        'ix_donations_status_created', 'ix_donations_created_at', 'ix_donations_user_id',
+        'ix_users_created_at'
+    )
+
+def sqlite_compiled_with(conn, option):
+    """Whether the SQLite library was built with an extension such as FTS5 or RTREE"""
+    if conn.dialect.name != 'sqlite':
+        return False
+    options = {row[0] for row in conn.execute(text('PRAGMA compile_options'))}
+    return f'ENABLE_{option}' in options
+
+def create_fts_index(conn, name, content_table, columns):
+    """Create an external-content FTS5 table mirrored from content_table by triggers"""
+    cols = ', '.join(columns)
+    new_vals = ', '.join(f'new.{c}' for c in columns)
+    old_vals = ', '.join(f'old.{c}' for c in columns)
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5("
+        f"{cols}, content='{content_table}', content_rowid='id')"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {content_table} BEGIN "
+        f"INSERT INTO {name}(rowid, {cols}) VALUES (new.id, {new_vals}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {content_table} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF {cols} ON {content_table} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); "
+        f"INSERT INTO {name}(rowid, {cols}) VALUES (new.id, {new_vals}); END"
+    ))
+    # Index rows that existed before the triggers
+    conn.execute(text(f"INSERT INTO {name}({name}) VALUES ('rebuild')"))
+
+@migration(2, 'Full-text search indexes for pets and users')
+def add_search_indexes(conn):
+    # Other databases fall back to LIKE matching in utils.search
+    if not sqlite_compiled_with(conn, 'FTS5'):
+        return
+    create_fts_index(conn, 'pets_fts', 'pets', ['name', 'breed', 'description', 'location'])
+    create_fts_index(conn, 'users_fts', 'users', ['full_name', 'email'])
+
+@migration(3, 'Spatial index for clinic lookups')
+def add_clinic_spatial_index(conn):
+    create_indexes(conn, 'ix_clinics_lat_lng')
+    if not sqlite_compiled_with(conn, 'RTREE'):
+        return
+    # Points are stored as zero-size boxes; triggers keep the tree in sync
+    conn.execute(text(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS clinics_rtree USING rtree('
+        'id, min_lat, max_lat, min_lng, max_lng)'
+    ))
+    conn.execute(text(
+        'CREATE TRIGGER IF NOT EXISTS clinics_rtree_ai AFTER INSERT ON clinics BEGIN '
+        'INSERT INTO clinics_rtree VALUES (new.id, new.lat, new.lat, new.lng, new.lng); END'
+    ))
+    conn.execute(text(
+        'CREATE TRIGGER IF NOT EXISTS clinics_rtree_au AFTER UPDATE OF lat, lng ON clinics BEGIN '
+        'UPDATE clinics_rtree SET min_lat = new.lat, max_lat = new.lat, '
+        'min_lng = new.lng, max_lng = new.lng WHERE id = new.id; END'
+    ))
+    conn.execute(text(
+        'CREATE TRIGGER IF NOT EXISTS clinics_rtree_ad AFTER DELETE ON clinics BEGIN '
+        'DELETE FROM clinics_rtree WHERE id = old.id; END'
+    ))
+    conn.execute(text(
+        'INSERT OR REPLACE INTO clinics_rtree SELECT id, lat, lat, lng, lng FROM clinics'
+    ))
+
+@migration(4, 'Backfill daily rollups for dashboard and donation stats')
+def backfill_daily_stats(conn):
+    DailyStat.__table__.create(conn, checkfirst=True)
+    DailyStat.rebuild(conn)
+
+def seed_versions(conn, names):
+    table = DataVersion.__table__
+    existing = {row[0] for row in conn.execute(table.select().with_only_columns(table.c.name))}
+    missing = [{'name': name, 'version': 0} for name in names if name not in existing]
+    if missing:
+        conn.execute(table.insert(), missing)
+
+@migration(5, 'Per-table data versions for ETags')
+def seed_data_versions(conn):
+    DataVersion.__table__.create(conn, checkfirst=True)
+    seed_versions(conn, TRACKED_TABLES)
+
+@migration(6, 'Rollups for pet moderation states')
+def backfill_pet_states(conn):
+    DailyStat.rebuild(conn)
+
+@migration(7, 'Per-column data versions for ETags')
+def seed_column_versions(conn):
+    seed_versions(conn, TRACKED_VERSIONS)
@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from models import db, Pet, User, Subscription
+from models.subscription import ANY
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class NotificationDispatcher:
+    """Tells Telegram subscribers about newly approved pets that match their saved searches.
+
+    Approving a pet only appends its id to an in-memory queue. A background
+    thread drains the queue every interval seconds, matches the pets against
+    subscriptions through the (pet_type, status, location) index (location
+    by containment, as in the catalog), merges everything one user should
+    hear about into a single message and sends at most rate messages per
+    second. Queued pets that weren't dispatched
+    yet are lost on restart.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._pending = []
+        self._thread = None
+        self._pid = None
+        self.app = None
+        self.token = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.token = app.config.get('TELEGRAM_BOT_TOKEN')
+        self.api_url = app.config.get('TELEGRAM_API_URL', 'https://api.telegram.org').rstrip('/')
+        self.site_url = (app.config.get('SITE_URL') or '').rstrip('/')
+        self.interval = app.config.get('NOTIFY_INTERVAL', 5)
+        self.rate = app.config.get('NOTIFY_RATE', 25)
+        self.max_pets = app.config.get('NOTIFY_MAX_PETS', 10)
+        app.extensions['notifier'] = self
+
+    @property
+    def enabled(self):
+        return bool(self.token)
+
+    def pets_approved(self, pet_ids):
+        """Queue newly approved pets; cheap enough to call inside the request"""
+        if not self.enabled or not pet_ids:
+            return
+        with self._lock:
+            self._pending.extend(pet_ids)
+        self._ensure_worker()
+
+    def dispatch(self):
+        """Match and send everything queued so far; returns the number of messages sent"""
+        with self._lock:
+            pet_ids, self._pending = self._pending, []
+        if not pet_ids:
+            return 0
+        recipients = self.match(list(dict.fromkeys(pet_ids)))
+        messages = [(chat_id, self.format_message(pets)) for chat_id, pets in recipients.items()]
+        db.session.rollback()  # Don't hold a read transaction while sending
+        return self.send_all(messages)
+
+    def match(self, pet_ids):
+        """{telegram_id: [pets]} for every subscriber with a matching saved search"""
+        pets = Pet.query.filter(Pet.id.in_(pet_ids)).filter_by(approved=True, is_active=True).all()
+
+        # One index lookup per distinct (type, status, location), however many pets share it
+        groups = defaultdict(list)
+        for pet in pets:
+            key = tuple(Subscription.normalize(v) for v in (pet.pet_type, pet.status, pet.location))
+            groups[key].append(pet)
+
+        recipients = defaultdict(dict)
+        for (pet_type, status, location), group in groups.items():
+            rows = db.session.query(Subscription, User.telegram_id)\
+                .join(User, User.id == Subscription.user_id)\
+                .filter(
+                    Subscription.pet_type.in_((pet_type, ANY)),
+                    Subscription.status.in_((status, ANY)),
+                    Subscription.location_matches(location),
+                    User.telegram_id.isnot(None),
+                    User.is_banned.isnot(True)
+                )
+            for subscription, telegram_id in rows:
+                for pet in group:
+                    if pet.user_id != subscription.user_id and subscription.matches_price(pet.price):
+                        recipients[telegram_id][pet.id] = pet
+        return {telegram_id: list(found.values()) for telegram_id, found in recipients.items()}
+
+    def format_message(self, pets):
+        lines = ["Qidiruvingizga mos yangi e'lonlar:", '']
+        for pet in pets[:self.max_pets]:
+            details = ', '.join(str(v) for v in (pet.pet_type, pet.breed, pet.location) if v)
+            price = f' - {pet.price:,.0f} so\'m' if pet.price else ''
+            line = f'{pet.name} ({details}){price}'
+            if self.site_url:
+                line += f'\n{self.site_url}/pet-detail.html?id={pet.id}'
+            lines.append(line)
+        if len(pets) > self.max_pets:
+            lines.append(f'... va yana {len(pets) - self.max_pets} ta')
+        return '\n'.join(lines)
+
+    def send_all(self, messages):
+        """Send (chat_id, text) pairs, spaced to stay under rate per second"""
+        sent = 0
+        next_at = time.monotonic()
+        for chat_id, text in messages:
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_at = max(next_at, time.monotonic()) + 1 / self.rate
+            if self.send_message(chat_id, text):
+                sent += 1
+        return sent
+
+    def send_message(self, chat_id, text, retries=2):
+        body = json.dumps({'chat_id': chat_id, 'text': text, 'disable_web_page_preview': True}).encode()
+        request = urllib.request.Request(
+            f'{self.api_url}/bot{self.token}/sendMessage', data=body,
+            headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=10):
+                metrics.inc('telegram_notifications_total', result='sent')
+                return True
+        except urllib.error.HTTPError as e:
+            if e.code == 429 and retries:
+                # Flood control: Telegram says how long to back off
+                try:
+                    retry_after = json.loads(e.read())['parameters']['retry_after']
+                except (ValueError, KeyError, TypeError):
+                    retry_after = 1
+                time.sleep(retry_after)
+                return self.send_message(chat_id, text, retries - 1)
+            # 403 means the user blocked the bot or never started it
+            level = logging.INFO if e.code == 403 else logging.WARNING
+            logger.log(level, 'Telegram notification rejected', extra={'chat_id': chat_id, 'status': e.code})
+        except (urllib.error.URLError, OSError):
+            logger.warning('Telegram notification failed', extra={'chat_id': chat_id}, exc_info=True)
+        metrics.inc('telegram_notifications_total', result='failed')
+        return False
+
+    def _ensure_worker(self):
+        # Started lazily so each forked gunicorn worker gets its own dispatcher
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='notifier', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                with self.app.app_context():
+                    self.dispatch()
+            except Exception:
+                logger.exception('Notification dispatch failed')
+
+notifier = NotificationDispatcher()
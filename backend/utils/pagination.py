@@ -0,0 +1,80 @@
+import base64
+import json
+from datetime import datetime
+from flask_sqlalchemy.pagination import QueryPagination
+from sqlalchemy import and_, or_
+
+# Upper bound for any per_page a client asks for
+MAX_PER_PAGE = 100
+
+def clamp_per_page(per_page, default=20):
+    """per_page limited to 1..MAX_PER_PAGE; None or garbage gives default"""
+    if not per_page:
+        return default
+    return max(1, min(per_page, MAX_PER_PAGE))
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+def encode_cursor(created_at, item_id):
+    """Encode (created_at, id) into an opaque URL-safe token"""
+    payload = json.dumps([created_at.isoformat() if created_at else None, item_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a token produced by encode_cursor back into (created_at, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(created_at) if created_at else None
+        return created_at, int(item_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+
+def keyset_paginate(query, model, cursor=None, per_page=20):
+    """Paginate newest-first on (created_at, id) without OFFSET or COUNT.
+
+    Rows without created_at come last, explicitly, since PostgreSQL would
+    otherwise sort NULLs first under DESC. Returns (items, next_cursor);
+    next_cursor is None on the last page.
+    """
+    per_page = clamp_per_page(per_page)
+    if cursor:
+        created_at, item_id = decode_cursor(cursor)
+        if created_at is None:
+            query = query.filter(model.created_at.is_(None), model.id < item_id)
+        else:
+            # Everything after a dated row: older, same time with lower id, or undated
+            query = query.filter(or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < item_id),
+                model.created_at.is_(None)
+            ))
+
+    # Fetch one extra row to know whether another page exists
+    items = query.order_by(model.created_at.desc().nulls_last(), model.id.desc())\
+        .limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return items, next_cursor
+
+class RankedPagination(QueryPagination):
+    """Pagination that counts one query and takes the page from another.
+
+    The page query may add joins that only matter for ordering, such as a
+    full-text rank, without making the COUNT pay for them.
+    """
+
+    def _query_items(self):
+        query = self._query_args['ranked']
+        return query.limit(self.per_page).offset(self._query_offset).all()
+
+def ranked_paginate(query, ranked, page=1, per_page=20):
+    """Like query.paginate, with the items read from ranked"""
+    return RankedPagination(query=query, ranked=ranked, page=page,
+                            per_page=clamp_per_page(per_page), error_out=False)
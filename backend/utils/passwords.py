@@ -0,0 +1,113 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from flask import has_request_context
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Stored for accounts that can't log in with a password (e.g. Telegram sign-ups)
+UNUSABLE_PASSWORD = '!'
+
+class PasswordHasher:
+    """Hashes and verifies passwords with a configurable method, off the request thread.
+
+    Work runs in a bounded process pool so a burst of logins can't pin every
+    thread of a worker on the GIL; when more than queue_size hashes are
+    pending new requests get a 503 at once instead of piling up. Outside a
+    request (the admin seed in create_app, CLI commands) hashing runs inline,
+    so no pool is started in a gunicorn master before it forks.
+
+    Pool processes come from a forkserver (spawn where there is none) rather
+    than forking a threaded web worker, which can copy held locks into the
+    child. The price is start-up: the first login of each worker waits for
+    the server and fresh interpreters (about half a second), which also
+    import the main module, so scripts starting the app need a __main__ guard.
+    """
+
+    def __init__(self, app=None):
+        self.method = 'scrypt'
+        self.salt_length = 16
+        self.workers = 0
+        self.queue_size = 0
+        self.timeout = 10
+        self._executor = None
+        self._slots = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._prefix = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+        self.salt_length = app.config.get('PASSWORD_SALT_LENGTH', 16)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+        self.queue_size = app.config.get('PASSWORD_HASH_QUEUE', 32)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+        self._prefix = None
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self._pid = None
+        app.extensions['password_hasher'] = self
+
+    def _run(self, fn, *args):
+        if self.workers <= 0 or not has_request_context():
+            return fn(*args)
+        executor, slots = self._ensure_pool()
+        if not slots.acquire(blocking=False):
+            raise ServiceUnavailable('Too many logins in progress, try again shortly')
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        # The slot frees when the hash is done, even if the request stopped waiting for it
+        future.add_done_callback(lambda f: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise ServiceUnavailable('Login is taking too long, try again shortly')
+
+    def _ensure_pool(self):
+        # Created lazily so each forked gunicorn worker has its own pool
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+                    self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+                    self._pid = pid
+        return self._executor, self._slots
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, pwhash, password):
+        if not pwhash or pwhash == UNUSABLE_PASSWORD:
+            return False
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Whether pwhash was made with different parameters than the configured method"""
+        if not pwhash or pwhash == UNUSABLE_PASSWORD:
+            return False
+        return pwhash.split('$', 1)[0] != self.current_prefix
+
+    @property
+    def current_prefix(self):
+        # Werkzeug stores the fully-expanded method, e.g. scrypt:32768:8:1
+        if self._prefix is None:
+            self._prefix = generate_password_hash('', self.method, 1).split('$', 1)[0]
+        return self._prefix
+
+def _pool_context():
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['werkzeug.security'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,166 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Longest repr of statement parameters written to the slow-query log
+MAX_PARAMS_LENGTH = 500
+
+def _origin():
+    if has_request_context():
+        return request.endpoint or 'unmatched', request.method
+    return 'background', None
+
+class SlowQueryLog:
+    """Logs statements slower than SLOW_QUERY_MS with their SQL, parameters and endpoint.
+
+    Only a timestamp is taken per statement, so it is cheap enough to stay on
+    in production; SLOW_QUERY_LOG_PARAMS=false leaves parameter values out.
+    """
+
+    def __init__(self, app=None):
+        self.threshold = 0
+        self.log_params = True
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.threshold = app.config.get('SLOW_QUERY_MS', 0) / 1000
+        self.log_params = app.config.get('SLOW_QUERY_LOG_PARAMS', True)
+        app.extensions['slow_query_log'] = self
+
+    def instrument_engine(self, engine):
+        if self.threshold <= 0:
+            return
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    # Timed on the execution context like utils.metrics, so failed statements leave nothing behind
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.slow_query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, 'slow_query_start', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        if elapsed < self.threshold:
+            return
+        endpoint, method = _origin()
+        extra = {
+            'duration_ms': round(elapsed * 1000, 1),
+            'endpoint': endpoint,
+            'method': method,
+            'sql': ' '.join(statement.split()),
+        }
+        if self.log_params:
+            params = repr(parameters)
+            if len(params) > MAX_PARAMS_LENGTH:
+                params = params[:MAX_PARAMS_LENGTH] + '...'
+            extra['params'] = params
+        if executemany:
+            extra['executemany'] = True
+        logger.warning('Slow query', extra=extra)
+
+class RequestProfiler:
+    """Runs cProfile on a sample of requests and keeps the reports.
+
+    A PROFILE_SAMPLE_RATE fraction of requests is profiled, plus any request
+    whose X-Profile header equals PROFILE_TOKEN; those get the report name
+    back in X-Profile-Report. At most one request per worker is profiled at
+    a time, and only the newest PROFILE_KEEP reports are kept in PROFILE_DIR
+    (load them with pstats or snakeviz).
+    """
+
+    HEADER = 'X-Profile'
+
+    def __init__(self, app=None):
+        self.sample_rate = 0
+        self.token = None
+        self.directory = None
+        self.keep = 100
+        self._busy = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0)
+        self.token = app.config.get('PROFILE_TOKEN')
+        self.directory = app.config.get('PROFILE_DIR')
+        self.keep = app.config.get('PROFILE_KEEP', 100)
+        if self.sample_rate > 0 or self.token:
+            os.makedirs(self.directory, exist_ok=True)
+            app.before_request(self._start)
+            app.after_request(self._finish)
+            app.teardown_request(self._abandon)
+        app.extensions['request_profiler'] = self
+
+    def _requested(self):
+        return bool(self.token) and request.headers.get(self.HEADER) == self.token
+
+    def _start(self):
+        requested = self._requested()
+        if not requested and random.random() >= self.sample_rate:
+            return
+        if not self._busy.acquire(blocking=False):
+            return
+        g.profile_requested = requested
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+    def _finish(self, response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        try:
+            name = self._save(profiler)
+        finally:
+            self._busy.release()
+        if g.pop('profile_requested', False):
+            response.headers['X-Profile-Report'] = name
+        return response
+
+    def _abandon(self, exc):
+        # after_request doesn't run when the view raised
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            self._busy.release()
+
+    def _save(self, profiler):
+        endpoint, method = _origin()
+        name = f'{time.strftime("%Y%m%d-%H%M%S")}-{endpoint}-{uuid.uuid4().hex[:8]}.prof'
+        profiler.dump_stats(os.path.join(self.directory, name))
+
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(15)
+        logger.info('Request profiled', extra={
+            'endpoint': endpoint, 'method': method, 'report': name, 'summary': summary.getvalue()
+        })
+        self._prune()
+        return name
+
+    def _prune(self):
+        if not self.keep:
+            return
+        paths = [os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.endswith('.prof')]
+        paths.sort(key=os.path.getmtime)
+        for old in paths[:-self.keep]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+slow_query_log = SlowQueryLog()
+request_profiler = RequestProfiler()
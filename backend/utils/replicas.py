@@ -0,0 +1,101 @@
+from functools import wraps
+from flask import g, request, has_request_context
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from sqlalchemy import event
+from models.routing import RoutingSession, REPLICA_PREFIX
+from .cache import response_cache, MemoryBackend, RedisBackend
+
+# Signed, short-lived cookie telling any worker that this client just wrote
+STICKY_COOKIE = 'replica_sticky'
+
+class ReplicaRouter:
+    """Decides per request whether reads may go to a replica.
+
+    After a client writes, its reads stay on the primary for sticky_seconds
+    so it sees its own changes despite replication lag. The marker travels
+    with the client as a signed cookie, so whichever worker serves the next
+    read honours it. For clients that drop cookies it is also kept in the
+    Redis cache backend when there is one, otherwise only in this process.
+    """
+
+    def __init__(self, app=None):
+        self.sticky_seconds = 5
+        self.replica_keys = []
+        self.backend = MemoryBackend(4096)
+        self.serializer = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+        self.replica_keys = [key for key in app.config.get('SQLALCHEMY_BINDS') or {} if key.startswith(REPLICA_PREFIX)]
+        if isinstance(response_cache.backend, RedisBackend):
+            self.backend = response_cache.backend
+        self.serializer = URLSafeTimedSerializer(app.secret_key, salt='replica-sticky')
+        app.after_request(self._set_sticky_cookie)
+        app.extensions['replica_router'] = self
+
+    @property
+    def enabled(self):
+        return bool(self.replica_keys)
+
+    def client_key(self):
+        """JWT identity of the caller, or its address when anonymous"""
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except Exception:
+            identity = None
+        if identity is not None:
+            return f'replica:sticky:user:{identity}'
+        return f'replica:sticky:ip:{request.remote_addr}'
+
+    def mark_write(self):
+        self.backend.set(self.client_key(), True, self.sticky_seconds)
+        g.replica_wrote = True
+
+    def is_sticky(self):
+        token = request.cookies.get(STICKY_COOKIE)
+        if token:
+            try:
+                self.serializer.loads(token, max_age=self.sticky_seconds)
+                return True
+            except BadSignature:  # Includes expired
+                pass
+        return bool(self.backend.get(self.client_key()))
+
+    def _set_sticky_cookie(self, response):
+        if g.get('replica_wrote'):
+            response.set_cookie(STICKY_COOKIE, self.serializer.dumps(1), max_age=self.sticky_seconds,
+                                httponly=True, samesite='Lax')
+        return response
+
+    def read_only(self, fn):
+        """Mark a view as read-only so its queries may be served by a replica"""
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            g.db_use_replica = self.enabled and not self.is_sticky()
+            return fn(*args, **kwargs)
+        return decorator
+
+replica_router = ReplicaRouter()
+read_only = replica_router.read_only
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _flushed(session, flush_context):
+    session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _bulk_statement(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session):
+    if session.info.pop('wrote', False) and has_request_context() and replica_router.enabled:
+        replica_router.mark_write()
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _rolled_back(session):
+    session.info.pop('wrote', None)
@@ -0,0 +1,80 @@
+import re
+from sqlalchemy import table, column, or_, select
+from models import Pet, User
+from .migrations import table_exists
+
+# SQLite FTS5 external-content indexes, kept in sync by triggers (see migrations)
+pets_fts = table('pets_fts', column('rowid'), column('rank'), column('pets_fts'))
+users_fts = table('users_fts', column('rowid'), column('rank'), column('users_fts'))
+
+PET_FTS_COLUMNS = ['name', 'breed', 'description', 'location']
+USER_FTS_COLUMNS = ['full_name', 'email']
+
+def tokenize(value):
+    return re.findall(r'\w+', value or '', re.UNICODE)
+
+def match_expression(value, column_name=None):
+    """Build an FTS5 prefix query: every word must match, quoted so input can't inject syntax"""
+    tokens = tokenize(value)
+    if not tokens:
+        return None
+    expr = '(' + ' '.join(f'"{t}"*' for t in tokens) + ')'
+    if column_name:
+        expr = f'{column_name} : {expr}'
+    return expr
+
+def fts_match(fts, expr):
+    return getattr(fts.c, fts.name).op('MATCH')(expr)
+
+def search_pets(query, q=None, location=None):
+    """Filter a Pet query by free text (name/breed/description/location) and location.
+
+    The MATCH runs once in an IN subquery rather than per row of a join, so
+    paginate's COUNT stays cheap; order the page with rank_pets. Location is
+    a substring match like the other catalog filters.
+    """
+    if location:
+        query = query.filter(Pet.location.ilike(f'%{location}%'))
+    if table_exists('pets_fts'):
+        expr = match_expression(q)
+        if expr:
+            query = query.filter(Pet.id.in_(select(pets_fts.c.rowid).where(fts_match(pets_fts, expr))))
+        return query
+
+    # Fallback for databases without FTS5
+    for token in tokenize(q):
+        query = query.filter(or_(*[getattr(Pet, c).ilike(f'%{token}%') for c in PET_FTS_COLUMNS]))
+    return query
+
+def rank_pets(query, q):
+    """Order a search_pets query by relevance; meant for the page query only.
+
+    Callers may append further order_by clauses as tie-breakers.
+    """
+    expr = match_expression(q)
+    if not expr or not table_exists('pets_fts'):
+        return query
+    return query.join(pets_fts, pets_fts.c.rowid == Pet.id)\
+        .filter(fts_match(pets_fts, expr))\
+        .order_by(pets_fts.c.rank)
+
+def search_users(query, q):
+    """Filter a User query by name or email; order the page with rank_users"""
+    if table_exists('users_fts'):
+        expr = match_expression(q)
+        if expr:
+            query = query.filter(User.id.in_(select(users_fts.c.rowid).where(fts_match(users_fts, expr))))
+        return query
+
+    for token in tokenize(q):
+        query = query.filter(or_(*[getattr(User, c).ilike(f'%{token}%') for c in USER_FTS_COLUMNS]))
+    return query
+
+def rank_users(query, q):
+    """Order a search_users query by relevance"""
+    expr = match_expression(q)
+    if not expr or not table_exists('users_fts'):
+        return query
+    return query.join(users_fts, users_fts.c.rowid == User.id)\
+        .filter(fts_match(users_fts, expr))\
+        .order_by(users_fts.c.rank)
@@ -0,0 +1,223 @@
+import csv
+import io
+import json
+from datetime import datetime, date
+from sqlalchemy import insert, select, text
+from sqlalchemy.exc import SQLAlchemyError
+from models import db, User, Pet, Clinic, Donation, DailyStat
+from .passwords import UNUSABLE_PASSWORD
+
+# Tables that can be exported/imported, by URL name
+TRANSFER_MODELS = {'users': User, 'pets': Pet, 'clinics': Clinic, 'donations': Donation}
+EXCLUDED_COLUMNS = {'users': {'password_hash'}}
+# Exported, but only imported when the caller opts in; otherwise they take their defaults
+PRIVILEGED_COLUMNS = {'users': {'role'}}
+FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n'}
+
+# Only this many row errors are listed in the import report
+MAX_REPORTED_ERRORS = 100
+
+def transfer_columns(model):
+    excluded = EXCLUDED_COLUMNS.get(model.__tablename__, set())
+    return [c for c in model.__table__.columns if c.name not in excluded]
+
+def _export_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def export_rows(model, fmt, batch_size=1000):
+    """Yield the table as CSV or NDJSON text, one id-ordered keyset batch at a time.
+
+    Each batch is its own short query, so memory and transaction length stay
+    constant however many rows there are.
+    """
+    columns = transfer_columns(model)
+    names = [c.name for c in columns]
+    id_column = model.__table__.c.id
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        yield buffer.getvalue()
+
+    last_id = None
+    while True:
+        query = select(*columns).order_by(id_column).limit(batch_size)
+        if last_id is not None:
+            query = query.where(id_column > last_id)
+        rows = db.session.execute(query).all()
+        if not rows:
+            break
+
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow(['' if v is None else _export_value(v) for v in row])
+            yield buffer.getvalue()
+        else:
+            yield ''.join(
+                json.dumps(dict(zip(names, map(_export_value, row))), ensure_ascii=False) + '\n'
+                for row in rows
+            )
+
+        last_id = rows[-1].id
+        db.session.rollback()  # Don't hold a read transaction between batches
+
+def read_rows(stream, fmt):
+    """Yield (line number, dict) from a CSV or NDJSON byte stream, parsing lazily.
+
+    Lines that aren't valid JSON are yielded as (line, ValueError).
+    """
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_no, line in enumerate(text_stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError('expected a JSON object')
+            yield line_no, row
+        except ValueError as e:
+            yield line_no, ValueError(f'Invalid JSON: {e}')
+
+def _coerce(column, value):
+    if isinstance(value, str):
+        value = value.strip()
+        if value == '':
+            return None
+    if value is None:
+        return None
+
+    python_type = column.type.python_type
+    if python_type is bool:
+        if isinstance(value, bool):
+            return value
+        lowered = str(value).lower()
+        if lowered in TRUE_VALUES:
+            return True
+        if lowered in FALSE_VALUES:
+            return False
+        raise ValueError('not a boolean')
+    if python_type is datetime:
+        return datetime.fromisoformat(value) if isinstance(value, str) else value
+    if python_type is int:
+        return int(value)
+    if python_type is float:
+        return float(value)
+    return str(value)
+
+def coerce_row(model, raw, privileged=False):
+    """Typed column values for one input row; raises ValueError on bad input"""
+    unknown = set(raw) - {c.name for c in transfer_columns(model)}
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+
+    ignored = set() if privileged else PRIVILEGED_COLUMNS.get(model.__tablename__, set())
+    row = {}
+    for column in transfer_columns(model):
+        try:
+            value = _coerce(column, None if column.name in ignored else raw.get(column.name))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f'{column.name}: {e}')
+        if value is None and column.default is not None and not column.primary_key:
+            arg = column.default.arg
+            value = arg(None) if callable(arg) else arg
+        if value is None and not column.nullable and not column.primary_key:
+            raise ValueError(f'{column.name} is required')
+        if value is not None or not column.primary_key:
+            row[column.name] = value
+
+    if model is User:
+        row['password_hash'] = UNUSABLE_PASSWORD  # Imported accounts must reset their password
+    return row
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def to_dict(self):
+        return {'inserted': self.inserted, 'failed': self.failed, 'errors': self.errors}
+
+def import_rows(model, rows, batch_size=500, privileged=False):
+    """Insert parsed rows in chunked transactions of batch_size.
+
+    A chunk is one executemany INSERT; if the database rejects it, its rows
+    are retried one at a time so only the offending lines are reported.
+    PRIVILEGED_COLUMNS are only taken from the input when privileged is set.
+    """
+    report = ImportReport()
+    batch = []
+    for line, raw in rows:
+        if isinstance(raw, Exception):
+            report.error(line, str(raw))
+            continue
+        try:
+            batch.append((line, coerce_row(model, raw, privileged)))
+        except ValueError as e:
+            report.error(line, str(e))
+            continue
+        if len(batch) >= batch_size:
+            _insert_batch(model, batch, report)
+            batch = []
+    if batch:
+        _insert_batch(model, batch, report)
+
+    _after_import(model, report)
+    return report
+
+def _insert_batch(model, batch, report):
+    table = model.__table__
+    # Rows with and without explicit ids need differently shaped statements
+    groups = [[row for _, row in batch if 'id' in row], [row for _, row in batch if 'id' not in row]]
+    try:
+        for group in groups:
+            if group:
+                db.session.execute(insert(table), group)
+        db.session.commit()
+        report.inserted += len(batch)
+        return
+    except SQLAlchemyError:
+        db.session.rollback()
+
+    for line, row in batch:
+        try:
+            db.session.execute(insert(table), [row])
+            db.session.commit()
+            report.inserted += 1
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            report.error(line, str(getattr(e, 'orig', e)))
+
+def _after_import(model, report):
+    if not report.inserted:
+        return
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        # Explicit ids don't advance the sequence
+        table = model.__tablename__
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+        ))
+    if model in (User, Pet, Donation):
+        # Core inserts skip the mapper events that maintain the rollups
+        DailyStat.rebuild(connection)
+    db.session.commit()
@@ -0,0 +1,172 @@
+import os
+import uuid
+import hashlib
+import struct
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+# Endpoints whose file parts must be images; others use Werkzeug's default spooling
+IMAGE_UPLOAD_ENDPOINTS = {'pets.add_pet', 'pets.update_pet', 'clinics.add_clinic', 'clinics.update_clinic'}
+
+# Extension stored for each detected format
+IMAGE_EXTENSIONS = {'png': 'png', 'jpeg': 'jpg', 'gif': 'gif', 'webp': 'webp'}
+
+# Give up looking for JPEG dimensions after this many bytes (large EXIF blocks)
+MAX_SNIFF_BYTES = 256 * 1024
+
+def sniff_format(head):
+    """Detect the image format from magic bytes, or None"""
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+def sniff_dimensions(kind, head):
+    """(width, height) from the image header, or None if not in head yet"""
+    try:
+        if kind == 'png' and len(head) >= 24:
+            return struct.unpack('>II', head[16:24])
+        if kind == 'gif' and len(head) >= 10:
+            return struct.unpack('<HH', head[6:10])
+        if kind == 'webp' and len(head) >= 30:
+            chunk = head[12:16]
+            if chunk == b'VP8 ':
+                w, h = struct.unpack('<HH', head[26:30])
+                return w & 0x3fff, h & 0x3fff
+            if chunk == b'VP8L':
+                bits = int.from_bytes(head[21:25], 'little')
+                return (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+            if chunk == b'VP8X':
+                return int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+        if kind == 'jpeg':
+            return jpeg_dimensions(head)
+    except struct.error:
+        pass
+    return None
+
+def jpeg_dimensions(head):
+    """Walk JPEG segments up to the first SOFn marker"""
+    i = 2
+    while i + 9 <= len(head):
+        if head[i] != 0xff:
+            return None
+        marker = head[i + 1]
+        if marker == 0xff:  # Fill byte
+            i += 1
+            continue
+        if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc):
+            h, w = struct.unpack('>HH', head[i + 5:i + 9])
+            return w, h
+        i += 2 + struct.unpack('>H', head[i + 2:i + 4])[0]
+    return None
+
+class ImageUploadStream:
+    """Write target for one multipart file part.
+
+    Validates magic bytes and dimensions from the first chunks and raises as
+    soon as the part is not an image or grows too large, so the rest of the
+    body is never read. Data goes to disk in the parser's chunks while being
+    hashed, keeping memory per upload constant.
+    """
+
+    def __init__(self, folder, max_size, max_pixels, validate=True):
+        os.makedirs(folder, exist_ok=True)
+        self.path = os.path.join(folder, uuid.uuid4().hex)
+        self.max_size = max_size
+        self.max_pixels = max_pixels
+        self.validate = validate
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.kind = None
+        self.dimensions = None
+        self._head = b''
+        self._file = open(self.path, 'w+b')
+
+    @property
+    def extension(self):
+        return IMAGE_EXTENSIONS.get(self.kind)
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            self.discard()
+            raise RequestEntityTooLarge(f'Image exceeds {self.max_size // (1024 * 1024)} MB')
+
+        if self.validate and self.dimensions is None and len(self._head) < MAX_SNIFF_BYTES:
+            self._head += data[:MAX_SNIFF_BYTES - len(self._head)]
+            self._sniff()
+
+        self.sha256.update(data)
+        return self._file.write(data)
+
+    def _sniff(self):
+        if self.kind is None:
+            if len(self._head) < 12:
+                return
+            self.kind = sniff_format(self._head)
+            if self.kind is None:
+                self.discard()
+                raise UnsupportedMediaType('Only PNG, JPEG, GIF and WebP images are allowed')
+
+        self.dimensions = sniff_dimensions(self.kind, self._head)
+        if self.dimensions is not None:
+            self._head = b''
+            width, height = self.dimensions
+            if width * height > self.max_pixels:
+                self.discard()
+                raise RequestEntityTooLarge('Image dimensions are too large')
+
+    def seek(self, *args):
+        return self._file.seek(*args)
+
+    def tell(self):
+        return self._file.tell()
+
+    def read(self, *args):
+        return self._file.read(*args)
+
+    def flush(self):
+        return self._file.flush()
+
+    def claim(self, destination):
+        """Move the spooled file to its final place"""
+        self._file.close()
+        os.replace(self.path, destination)
+
+    def discard(self):
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        # Called when the request ends; unclaimed uploads are removed
+        self.discard()
+
+# Endpoints that stream large bodies and get IMPORT_MAX_SIZE instead of MAX_CONTENT_LENGTH
+IMPORT_ENDPOINTS = {'admin.import_table'}
+
+class UploadRequest(Request):
+    """Request class that streams image uploads through ImageUploadStream"""
+
+    @property
+    def max_content_length(self):
+        if self.endpoint in IMPORT_ENDPOINTS:
+            return current_app.config.get('IMPORT_MAX_SIZE')
+        return super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint not in IMAGE_UPLOAD_ENDPOINTS:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+        config = current_app.config
+        return ImageUploadStream(
+            os.path.join(config['UPLOAD_FOLDER'], '.tmp'),
+            config.get('MAX_IMAGE_SIZE', config['MAX_CONTENT_LENGTH']),
+            config.get('MAX_IMAGE_PIXELS', 40_000_000)
+        )
@@ -0,0 +1,96 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from sqlalchemy import update, bindparam
+from models import db, Pet
+
+logger = logging.getLogger(__name__)
+
+class ViewCounter:
+    """Buffers pet detail views in memory and writes them back in batches.
+
+    Each flush issues one executemany of UPDATE pets SET views = views + n,
+    so concurrent workers never overwrite each other's counts. Flushes don't
+    bump the pets data version: view counts alone shouldn't invalidate ETags.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._thread = None
+        self._pid = None
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('VIEW_FLUSH_INTERVAL', 10)
+        app.extensions['view_counter'] = self
+        atexit.register(self._flush_on_exit)
+
+    def record(self, pet_id):
+        """Count one view of pet_id"""
+        with self._lock:
+            self._pending[pet_id] += 1
+        self._ensure_worker()
+
+    def pending(self, pet_id):
+        """Views recorded for pet_id that are not flushed yet"""
+        return self._pending.get(pet_id, 0)
+
+    def flush(self):
+        """Write buffered views to the database; returns number of pets updated"""
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+        if not batch:
+            return 0
+
+        pets = Pet.__table__
+        stmt = update(pets)\
+            .where(pets.c.id == bindparam('pet_id'))\
+            .values(views=pets.c.views + bindparam('n'), updated_at=pets.c.updated_at)\
+            .execution_options(skip_data_version=True)
+        try:
+            db.session.execute(stmt, [{'pet_id': pet_id, 'n': n} for pet_id, n in batch.items()])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Keep the counts for the next attempt
+            with self._lock:
+                self._pending.update(batch)
+            raise
+        return len(batch)
+
+    def _ensure_worker(self):
+        # Started lazily so each forked gunicorn worker gets its own flusher
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='view-counter', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                with self.app.app_context():
+                    self.flush()
+            except Exception:
+                logger.exception('View counter flush failed')
+
+    def _flush_on_exit(self):
+        if self._pending and self.app is not None:
+            try:
+                with self.app.app_context():
+                    self.flush()
+            except Exception:
+                pass
+
+view_counter = ViewCounter()
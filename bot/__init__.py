@@ -0,0 +1,4 @@
+from .api import BackendClient, BackendError
+from .config import Config
+
+__all__ = ['BackendClient', 'BackendError', 'Config']
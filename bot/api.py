@@ -0,0 +1,121 @@
+import asyncio
+import time
+from collections import OrderedDict
+import aiohttp
+
+class TTLCache:
+    """Small LRU of values that each expire after their own ttl"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+class BackendError(Exception):
+    """The backend answered with an unexpected status"""
+
+    def __init__(self, status, body):
+        super().__init__(f'Backend returned {status}')
+        self.status = status
+        self.body = body
+
+class BackendClient:
+    """Backend API client sharing one pooled keep-alive aiohttp session.
+
+    telegram/check results are cached per user, and concurrent lookups for
+    the same user share a single request.
+    """
+
+    def __init__(self, config):
+        self.base_url = config.API_URL
+        self.config = config
+        self.cache = TTLCache(config.CHECK_CACHE_SIZE)
+        self.session = None
+        self._inflight = {}
+        self.requests = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    async def start(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.config.API_POOL_SIZE,
+                keepalive_timeout=self.config.API_KEEPALIVE_SECONDS,
+                ttl_dns_cache=300
+            )
+            timeout = aiohttp.ClientTimeout(total=self.config.API_TIMEOUT)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout, raise_for_status=False)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _request(self, method, path, **kwargs):
+        await self.start()
+        self.requests += 1
+        async with self.session.request(method, self.base_url + path, **kwargs) as response:
+            data = await response.json(content_type=None)
+            return response.status, data
+
+    async def check_user(self, telegram_id):
+        """{'exists': bool, 'user': {...}} for a Telegram account"""
+        cached = self.cache.get(telegram_id)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+        self.cache_misses += 1
+
+        pending = self._inflight.get(telegram_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        pending = self._inflight[telegram_id] = asyncio.ensure_future(self._check_user(telegram_id))
+        return await asyncio.shield(pending)
+
+    async def _check_user(self, telegram_id):
+        try:
+            status, data = await self._request('GET', f'/api/auth/telegram/check/{telegram_id}')
+            if status != 200:
+                raise BackendError(status, data)
+            ttl = self.config.CHECK_CACHE_TTL if data.get('exists') else self.config.CHECK_CACHE_MISS_TTL
+            self.cache.set(telegram_id, data, ttl)
+            return data
+        finally:
+            self._inflight.pop(telegram_id, None)
+
+    async def telegram_login(self, telegram_id, full_name, username=''):
+        """Sign in or register a Telegram account; returns the login response"""
+        status, data = await self._request('POST', '/api/auth/telegram', json={
+            'telegram_id': telegram_id, 'full_name': full_name, 'username': username
+        })
+        if status != 200:
+            raise BackendError(status, data)
+        self.cache.set(telegram_id, {'exists': True, 'user': data['user']}, self.config.CHECK_CACHE_TTL)
+        return data
+
+    async def latest_pets(self, limit=5):
+        status, data = await self._request('GET', '/api/pets/list', params={
+            'per_page': limit, 'fields': 'id,name,pet_type,status,location'
+        })
+        if status != 200:
+            raise BackendError(status, data)
+        return data['pets']
@@ -0,0 +1,125 @@
+"""Bot throughput against the local Telegram stub and the Flask backend.
+
+Queues a burst of updates from many users in the stub, runs the bot until
+every one is answered and reports updates per second, backend requests
+and the telegram/check cache hit rate. Without --api-url the backend runs
+in this process on a throwaway SQLite database, so the root
+requirements.txt (backend and bot) must be installed:
+
+    python -m bot.benchmark --users 500 --updates 5000 --concurrency 50
+    python -m bot.benchmark --no-cache --pool 1    # compare against no cache / no pooling
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from .api import BackendClient
+from .config import Config
+from .main import create_bot, create_dispatcher
+from .stub_server import TelegramStub, make_update
+
+BACKEND_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+FIRST_USER_ID = 10_000
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_backend():
+    """Serve the Flask app from a thread; returns its base URL"""
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///' + tempfile.mktemp(suffix='.db'))
+    sys.path.insert(0, BACKEND_PATH)
+    from werkzeug.serving import make_server
+    from app import app
+
+    server = make_server('127.0.0.1', free_port(), app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}'
+
+def parse_mix(mix):
+    """'me:8,pets:1' -> (['/me', '/pets'], [8, 1])"""
+    commands, weights = [], []
+    for item in mix.split(','):
+        command, _, weight = item.partition(':')
+        commands.append('/' + command.strip().lstrip('/'))
+        weights.append(float(weight or 1))
+    return commands, weights
+
+async def run(args):
+    api_url = args.api_url or start_backend()
+    stub = TelegramStub()
+    await stub.start(port=free_port())
+
+    config = type('BenchmarkConfig', (Config,), {
+        'BOT_TOKEN': '123456:benchmark',
+        'TELEGRAM_API_URL': stub.url,
+        'API_URL': api_url.rstrip('/'),
+        'SITE_URL': api_url.rstrip('/'),
+        'API_POOL_SIZE': args.pool,
+        'MAX_CONCURRENT_UPDATES': args.concurrency,
+        'CHECK_CACHE_TTL': 0 if args.no_cache else Config.CHECK_CACHE_TTL,
+        'CHECK_CACHE_MISS_TTL': 0 if args.no_cache else Config.CHECK_CACHE_MISS_TTL,
+    })
+
+    # Half the users already have accounts
+    setup = BackendClient(config)
+    user_ids = [FIRST_USER_ID + i for i in range(args.users)]
+    await asyncio.gather(*(setup.telegram_login(uid, f'User {uid}') for uid in user_ids[::2]))
+    await setup.close()
+
+    rng = random.Random(args.seed)
+    commands, weights = parse_mix(args.mix)
+    stub.add_updates([
+        make_update(i + 1, rng.choice(user_ids), rng.choices(commands, weights)[0])
+        for i in range(args.updates)
+    ])
+
+    api = BackendClient(config)
+    bot = create_bot(config)
+    dp = create_dispatcher(config, api)
+    start = time.perf_counter()
+    polling = asyncio.create_task(dp.start_polling(bot, handle_as_tasks=True, handle_signals=False))
+    try:
+        await stub.wait_for_replies(args.updates, timeout=args.timeout)
+        elapsed = time.perf_counter() - start
+    finally:
+        await dp.stop_polling()
+        await polling
+        await stub.stop()
+
+    lookups = api.cache_hits + api.cache_misses
+    return {
+        'updates': args.updates,
+        'users': args.users,
+        'concurrency': args.concurrency,
+        'pool_size': args.pool,
+        'check_cache': not args.no_cache,
+        'seconds': round(elapsed, 2),
+        'updates_per_sec': round(args.updates / elapsed, 1),
+        'backend_requests': api.requests,
+        'check_cache_hit_rate': round(api.cache_hits / lookups, 3) if lookups else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--api-url', help='running backend to use instead of an in-process one')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--updates', type=int, default=5000)
+    parser.add_argument('--mix', default='me:8,pets:1,login:1', help='command:weight list')
+    parser.add_argument('--concurrency', type=int, default=Config.MAX_CONCURRENT_UPDATES)
+    parser.add_argument('--pool', type=int, default=Config.API_POOL_SIZE, help='backend connection pool size')
+    parser.add_argument('--no-cache', action='store_true', help='disable the telegram/check cache')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--timeout', type=float, default=600)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+import os
+
+class Config:
+    # Telegram
+    BOT_TOKEN = os.environ.get('BOT_TOKEN')
+    # Point at a local stub (see bot/stub_server.py) for testing and benchmarks
+    TELEGRAM_API_URL = os.environ.get('TELEGRAM_API_URL') or 'https://api.telegram.org'
+
+    # Backend API and the site users are sent to for login
+    API_URL = (os.environ.get('API_URL') or 'http://127.0.0.1:5000').rstrip('/')
+    SITE_URL = (os.environ.get('SITE_URL') or API_URL).rstrip('/')
+
+    # Shared keep-alive connection pool to the backend
+    API_POOL_SIZE = int(os.environ.get('API_POOL_SIZE', 20))
+    API_KEEPALIVE_SECONDS = int(os.environ.get('API_KEEPALIVE_SECONDS', 30))
+    API_TIMEOUT = float(os.environ.get('API_TIMEOUT', 10))
+
+    # telegram/check results per user; unknown users are rechecked sooner since they may sign up any moment
+    CHECK_CACHE_TTL = int(os.environ.get('CHECK_CACHE_TTL', 300))
+    CHECK_CACHE_MISS_TTL = int(os.environ.get('CHECK_CACHE_MISS_TTL', 10))
+    CHECK_CACHE_SIZE = int(os.environ.get('CHECK_CACHE_SIZE', 10000))
+
+    # Updates handled at the same time
+    MAX_CONCURRENT_UPDATES = int(os.environ.get('MAX_CONCURRENT_UPDATES', 50))
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from urllib.parse import urlencode
+from aiogram import BaseMiddleware, Router
+from aiogram.filters import Command, CommandObject, CommandStart
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
+from .api import BackendError
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+class ConcurrencyLimit(BaseMiddleware):
+    """Lets at most limit updates be handled at once; the rest wait their turn"""
+
+    def __init__(self, limit):
+        self._slots = asyncio.Semaphore(limit)
+
+    async def __call__(self, handler, event, data):
+        async with self._slots:
+            return await handler(event, data)
+
+def login_url(site_url, user):
+    params = {'tg_id': user.id, 'tg_name': user.full_name}
+    if user.username:
+        params['tg_user'] = user.username
+    return f'{site_url}/login.html?{urlencode(params)}'
+
+def login_keyboard(site_url, user):
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text='Saytga kirish', url=login_url(site_url, user))
+    ]])
+
+@router.message(CommandStart())
+async def start(message: Message, command: CommandObject, config):
+    if command.args == 'login':
+        return await login(message, config)
+    await message.answer(
+        "Pet Tashkent botiga xush kelibsiz!\n\n"
+        "/login - saytga kirish\n"
+        "/me - hisobingiz\n"
+        "/pets - yangi e'lonlar"
+    )
+
+@router.message(Command('login'))
+async def login(message: Message, config):
+    await message.answer(
+        'Saytga kirish uchun tugmani bosing:',
+        reply_markup=login_keyboard(config.SITE_URL, message.from_user)
+    )
+
+@router.message(Command('me'))
+async def me(message: Message, api, config):
+    try:
+        result = await api.check_user(message.from_user.id)
+    except (BackendError, OSError, asyncio.TimeoutError):
+        logger.exception('telegram/check failed')
+        return await message.answer("Server bilan bog'lanib bo'lmadi, keyinroq urinib ko'ring.")
+
+    if not result.get('exists'):
+        return await message.answer(
+            "Siz hali ro'yxatdan o'tmagansiz.",
+            reply_markup=login_keyboard(config.SITE_URL, message.from_user)
+        )
+    user = result['user']
+    await message.answer(f"{user['full_name']}\n{user['email']}")
+
+@router.message(Command('pets'))
+async def pets(message: Message, api, config):
+    try:
+        items = await api.latest_pets()
+    except (BackendError, OSError, asyncio.TimeoutError):
+        logger.exception('Loading pets failed')
+        return await message.answer("Server bilan bog'lanib bo'lmadi, keyinroq urinib ko'ring.")
+
+    if not items:
+        return await message.answer("Hozircha e'lonlar yo'q.")
+    lines = [f"{pet['name']} - {pet['pet_type']}, {pet['location'] or ''}".rstrip(', ') for pet in items]
+    await message.answer('\n'.join(lines) + f'\n\n{config.SITE_URL}/pets.html')
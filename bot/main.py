@@ -0,0 +1,51 @@
+"""Pet Tashkent Telegram bot.
+
+    pip install -r bot/requirements.txt
+    BOT_TOKEN=... API_URL=http://127.0.0.1:5000 python -m bot
+"""
+import asyncio
+import logging
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from .api import BackendClient
+from .config import Config
+from .handlers import router, ConcurrencyLimit
+
+def create_bot(config):
+    session = AiohttpSession(api=TelegramAPIServer.from_base(config.TELEGRAM_API_URL))
+    return Bot(config.BOT_TOKEN, session=session)
+
+def create_dispatcher(config, api):
+    """Dispatcher with the handlers, the update concurrency limit and shared dependencies"""
+    dp = Dispatcher()
+    dp.update.outer_middleware(ConcurrencyLimit(config.MAX_CONCURRENT_UPDATES))
+    dp.include_router(router)
+    # Passed by name to handlers that ask for them
+    dp['api'] = api
+    dp['config'] = config
+
+    async def on_startup():
+        await api.start()
+
+    async def on_shutdown():
+        await api.close()
+
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+    return dp
+
+async def run(config=Config):
+    if not config.BOT_TOKEN:
+        raise SystemExit('BOT_TOKEN is not set')
+    bot = create_bot(config)
+    dp = create_dispatcher(config, BackendClient(config))
+    # Updates run as tasks so a slow backend call doesn't hold up the others
+    await dp.start_polling(bot, handle_as_tasks=True)
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    asyncio.run(run())
+
+if __name__ == '__main__':
+    main()
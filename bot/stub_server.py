@@ -0,0 +1,104 @@
+"""Minimal local stand-in for the Telegram Bot API.
+
+Serves queued updates through getUpdates and records everything the bot
+sends, so the bot can be exercised and benchmarked without Telegram:
+
+    stub = TelegramStub()
+    await stub.start(port=8081)
+    stub.add_updates([make_update(1, 42, '/me')])
+    # run the bot with TELEGRAM_API_URL=stub.url
+"""
+import asyncio
+import time
+from aiohttp import web
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Pet Tashkent', 'username': 'pet_tashkent_stub_bot'}
+
+def make_update(update_id, user_id, text):
+    user = {'id': user_id, 'is_bot': False, 'first_name': f'User {user_id}', 'username': f'user{user_id}'}
+    command_length = len(text.split(' ', 1)[0]) if text.startswith('/') else 0
+    message = {
+        'message_id': update_id, 'date': int(time.time()), 'text': text,
+        'chat': {'id': user_id, 'type': 'private', 'first_name': user['first_name']},
+        'from': user,
+    }
+    if command_length:
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': command_length}]
+    return {'update_id': update_id, 'message': message}
+
+class TelegramStub:
+    def __init__(self):
+        self.updates = []
+        self.sent = []
+        self._offset = 0
+        self._new_updates = asyncio.Event()
+        self._waiters = []
+        self._runner = None
+        self.url = None
+
+    async def start(self, host='127.0.0.1', port=8081):
+        app = web.Application()
+        app.router.add_route('*', '/bot{token}/{method}', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self.url = f'http://{host}:{port}'
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def add_updates(self, updates):
+        self.updates.extend(updates)
+        self._new_updates.set()
+
+    async def wait_for_replies(self, count, timeout=None):
+        """Wait until the bot has sent at least count messages"""
+        if len(self.sent) >= count:
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((count, future))
+        await asyncio.wait_for(future, timeout)
+
+    async def _handle(self, request):
+        method = request.match_info['method']
+        params = dict(await request.post()) if request.can_read_body else {}
+        params.update(request.query)
+
+        if method == 'getMe':
+            result = BOT_USER
+        elif method == 'getUpdates':
+            result = await self._get_updates(params)
+        elif method == 'sendMessage':
+            result = self._record_message(params)
+        else:
+            result = True
+        return web.json_response({'ok': True, 'result': result})
+
+    async def _get_updates(self, params):
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+        # Updates before offset are confirmed and never sent again
+        self._offset = max(self._offset, offset)
+        pending = [u for u in self.updates if u['update_id'] >= self._offset][:limit]
+        if not pending and timeout:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+            pending = [u for u in self.updates if u['update_id'] >= self._offset][:limit]
+        return pending
+
+    def _record_message(self, params):
+        chat_id = int(params['chat_id'])
+        self.sent.append({'chat_id': chat_id, 'text': params.get('text'), 'time': time.perf_counter()})
+        for count, future in list(self._waiters):
+            if len(self.sent) >= count and not future.done():
+                future.set_result(None)
+                self._waiters.remove((count, future))
+        return {
+            'message_id': len(self.sent), 'date': int(time.time()), 'text': params.get('text'),
+            'chat': {'id': chat_id, 'type': 'private'}, 'from': BOT_USER,
+        }